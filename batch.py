@@ -0,0 +1,127 @@
+# runs many .skibidi programs at once, spread over a pool of processes. every worker imports the
+# interpreter once and then runs job after job, and each job's output is collected on its own
+# usage: python batch.py FILE_OR_GLOB ... [--workers N] [--timeout SECONDS] [--format text|jsonl] [--unordered]
+import os
+import sys
+import glob
+import json
+import time
+import signal
+import argparse
+from functools import partial, lru_cache
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, Iterator, List
+
+from skibidi_interpreter import load_program, run_program, engines
+from program_cache import ProgramCache
+from optimizer import levels
+from output import CollectedOutput
+
+# a BaseException like KeyboardInterrupt, so no "except Exception" a job passes through on its way
+# (a cache miss, a fold that gives up) can swallow it. the timer only fires once, so a swallowed
+# timeout would leave the job running with no limit at all
+class JobTimeout(BaseException):
+    pass
+
+def raise_timeout(signum, frame):
+    raise JobTimeout()
+
+# files are kept as given, directories are searched for .skibidi files and anything else is a glob.
+# the result is sorted within each argument so runs are repeatable
+def find_jobs(patterns: List[str]) -> List[str]:
+    paths = []
+    for pattern in patterns:
+        if os.path.isfile(pattern):
+            found = [pattern]
+        elif os.path.isdir(pattern):
+            found = glob.glob(os.path.join(pattern, '**', '*.skibidi'), recursive=True)
+        else:
+            found = glob.glob(pattern, recursive=True)
+        paths += sorted(path for path in found if os.path.isfile(path))
+    return list(dict.fromkeys(paths))
+
+# made once per worker, since working out the interpreter version reads the interpreter's files
+@lru_cache(maxsize=None)
+def worker_cache() -> ProgramCache:
+    return ProgramCache()
+
+def describe(error: BaseException) -> str:
+    return '\n'.join([f'{type(error).__name__}: {error}'] + getattr(error, '__notes__', []))
+
+# runs in a worker. the timeout is a timer signal, so it can stop a program in the middle of a loop
+def run_job(path: str, engine: str = 'tree', opt_level: int = 1, timeout: float = None, use_cache: bool = True) -> Dict:
+    output = CollectedOutput()
+    result = {'file': path, 'status': 'ok', 'error': None}
+    start = time.perf_counter()
+    if timeout:
+        signal.signal(signal.SIGALRM, raise_timeout)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        program = load_program(path, worker_cache() if use_cache else None)
+        run_program(program, engine, opt_level=opt_level, output=output)
+    except JobTimeout:
+        result['status'] = 'timeout'
+        result['error'] = f'timed out after {timeout:g} seconds'
+    except Exception as error:
+        result['status'] = 'error'
+        result['error'] = describe(error)
+    finally:
+        if timeout:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+    result['seconds'] = time.perf_counter() - start
+    result['output'] = output.getvalue()
+    return result
+
+def run_jobs(paths: List[str], workers: int, ordered: bool, **options) -> Iterator[Dict]:
+    with ProcessPoolExecutor(workers) as executor:
+        if ordered:
+            # sending jobs in chunks saves a round trip to the worker for every small program
+            chunk_size = max(1, len(paths) // (workers * 4))
+            yield from executor.map(partial(run_job, **options), paths, chunksize=chunk_size)
+        else:
+            futures = [executor.submit(run_job, path, **options) for path in paths]
+            for future in as_completed(futures):
+                yield future.result()
+
+def write_result(result: Dict, result_format: str):
+    if result_format == 'jsonl':
+        sys.stdout.write(json.dumps(result) + '\n')
+        return
+    sys.stdout.write(f'==> {result["file"]} <==\n')
+    sys.stdout.write(result['output'])
+    if result['error'] is not None:
+        sys.stdout.write(f'{result["error"]}\n')
+
+def main():
+    arg_parser = argparse.ArgumentParser(description='run many .skibidi programs in parallel')
+    arg_parser.add_argument('files', nargs='+', help='programs, directories to search for .skibidi files, or globs')
+    arg_parser.add_argument('--workers', type=int, default=os.cpu_count(), help='processes to run programs in (default: one per cpu)')
+    arg_parser.add_argument('--timeout', type=float, help='seconds a program can run before it is stopped')
+    arg_parser.add_argument('--engine', choices=engines, default='tree', help='how to run the programs (default: tree)')
+    arg_parser.add_argument('--opt-level', type=int, choices=levels, default=1, help='see skibidi_interpreter.py (default: 1)')
+    arg_parser.add_argument('--format', choices=['text', 'jsonl'], default='text', help='text prints every output under a header, jsonl prints one JSON object per program (default: text)')
+    arg_parser.add_argument('--unordered', action='store_true', help='print results as programs finish instead of in the order they were given')
+    arg_parser.add_argument('--no-cache', action='store_true', help="don't read or write the compiled program cache")
+    args = arg_parser.parse_args()
+
+    paths = find_jobs(args.files)
+    if not paths:
+        arg_parser.error('no programs found')
+    start = time.perf_counter()
+    counts = {'ok': 0, 'error': 0, 'timeout': 0}
+    busy = 0.0
+    results = run_jobs(paths, args.workers, not args.unordered, engine=args.engine, opt_level=args.opt_level, timeout=args.timeout, use_cache=not args.no_cache)
+    for result in results:
+        write_result(result, args.format)
+        counts[result['status']] += 1
+        busy += result['seconds']
+    elapsed = time.perf_counter() - start
+    sys.stdout.flush()
+    print(f'{len(paths)} programs in {elapsed:.2f}s ({len(paths) / elapsed:.1f}/s) on {args.workers} workers: '
+          f'{counts["ok"]} ok, {counts["error"]} failed, {counts["timeout"]} timed out, '
+          f'{busy:.2f}s spent running them', file=sys.stderr)
+    if counts['ok'] != len(paths):
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
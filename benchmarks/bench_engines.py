@@ -0,0 +1,49 @@
+# how long each engine takes to run the same workloads (see workloads.py), not counting lexing and parsing.
+# the vm dispatches every instruction in one python loop, and on CPython each of those costs about as
+# much as a whole closure call in the tree engine, so the vm is the slowest engine here: it's kept for
+# the limits and run_async, which can stop it between any two loop iterations and carry on later.
+# on a 1 CPU machine with python 3.11, counted_loop and while_loop (1M iterations each) took
+#   tree 0.42s and 1.05s, vm 2.2s and 4.2s, python 0.06s and 0.11s
+# and the vm took 6.7s on both before it had instructions for counted loops and for operators with
+# a literal or a variable on the right
+# usage: python benchmarks/bench_engines.py [workload ...] [--repeat N]
+import os
+import sys
+import time
+import argparse
+import contextlib
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [root, os.path.dirname(os.path.abspath(__file__))]
+
+from skibidi_interpreter import code_to_lexemes, build_program, run_program, engines
+from workloads import generate
+
+default_workloads = ['counted_loop', 'while_loop', 'nested_loops', 'elif_chain', 'string_append']
+
+# the fastest of repeat runs, each on a fresh tree since running a program changes it
+def best_time(code: str, engine: str, repeat: int) -> float:
+    lexemes = code_to_lexemes(code)
+    best = float('inf')
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        for _ in range(repeat):
+            program = build_program(lexemes)
+            start = time.perf_counter()
+            run_program(program, engine)
+            best = min(best, time.perf_counter() - start)
+    return best
+
+def main():
+    arg_parser = argparse.ArgumentParser(description='time every engine on the same workloads')
+    arg_parser.add_argument('workloads', nargs='*', help=f'workloads to run (default: {" ".join(default_workloads)})')
+    arg_parser.add_argument('--repeat', type=int, default=3, help='runs of each, the fastest counts (default: 3)')
+    args = arg_parser.parse_args()
+
+    print(f'{"workload":<16}' + ''.join(f'{engine:>10}' for engine in engines) + f'{"vm/tree":>10}')
+    for spec in args.workloads or default_workloads:
+        code, _ = generate(spec)
+        times = {engine: best_time(code, engine, args.repeat) for engine in engines}
+        print(f'{spec:<16}' + ''.join(f'{times[engine]:>9.3f}s' for engine in engines) + f'{times["vm"] / times["tree"]:>9.1f}x')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,46 @@
+# compares the throughput of code_to_lexemes with the original character by character lexer
+# usage: python benchmarks/bench_lexer.py [file.skibidi] [--size MB] [--repeat N]
+import os
+import sys
+import time
+import argparse
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [root, os.path.join(root, 'old')]
+
+from skibidi_interpreter import code_to_lexemes
+from skibidi_lexer_old import code_to_lexemes as old_code_to_lexemes
+
+# the example programs glued together and repeated until they're about size_mb megabytes
+def generate_source(size_mb: float) -> str:
+    names = ['example2.skibidi', 'example3.skibidi', 'fizzbuzz.skibidi']
+    sample = '\n'.join(open(os.path.join(root, name)).read() for name in names) + '\n'
+    return sample * max(1, int(size_mb * 1024 * 1024 / len(sample)))
+
+def throughput(lexer, code: str, repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        lexer(code)
+        best = min(best, time.perf_counter() - start)
+    return len(code.encode()) / (1024 * 1024) / best
+
+def main():
+    arg_parser = argparse.ArgumentParser(description='lexer throughput in MB/s, old vs new')
+    arg_parser.add_argument('file', nargs='?')
+    arg_parser.add_argument('--size', type=float, default=2, help='size of the generated source in MB (default: 2)')
+    arg_parser.add_argument('--repeat', type=int, default=3, help='runs per lexer, the best one counts (default: 3)')
+    args = arg_parser.parse_args()
+
+    code = open(args.file).read() if args.file else generate_source(args.size)
+    if code_to_lexemes(code) != old_code_to_lexemes(code):
+        sys.exit('the lexers disagree on this source')
+
+    old = throughput(old_code_to_lexemes, code, args.repeat)
+    new = throughput(code_to_lexemes, code, args.repeat)
+    print(f'source: {len(code.encode()) / (1024 * 1024):.2f} MB')
+    print(f'old lexer: {old:8.2f} MB/s')
+    print(f'new lexer: {new:8.2f} MB/s ({new / old:.1f}x)')
+
+if __name__ == '__main__':
+    main()
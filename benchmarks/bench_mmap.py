@@ -0,0 +1,68 @@
+# peak memory and time of lexing a source read into a str vs mapped and lexed as bytes (--mmap).
+# each run is a fresh process, so its peak RSS is its own
+# usage: python benchmarks/bench_mmap.py [file.skibidi] [--size MB] [--full]
+import os
+import sys
+import time
+import argparse
+import tempfile
+import subprocess
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [root, os.path.dirname(os.path.abspath(__file__))]
+
+from bench_lexer import generate_source
+
+# lexes into a TokenStream like load_program's lexemes would be kept, in a child process
+lex_script = '''
+import sys, mmap
+sys.path.insert(0, sys.argv[1])
+from lexical import TokenStream
+from skibidi_interpreter import code_to_lexemes, code_to_lexemes_bytes
+if sys.argv[3] == 'mmap':
+    with open(sys.argv[2], 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as code:
+        lexemes = code_to_lexemes_bytes(code, TokenStream())
+else:
+    with open(sys.argv[2], 'r') as file:
+        lexemes = code_to_lexemes(file.read(), TokenStream())
+'''
+
+# returns the seconds it took and its peak RSS in bytes (ru_maxrss is in KB on linux)
+def measure(command) -> tuple:
+    start = time.perf_counter()
+    process = subprocess.Popen(command, stdout=subprocess.DEVNULL)
+    _, status, usage = os.wait4(process.pid, 0)
+    code = os.waitstatus_to_exitcode(status)
+    if code:
+        sys.exit(f'{" ".join(command)} exited with {code}')
+    return time.perf_counter() - start, usage.ru_maxrss * 1024
+
+def main():
+    arg_parser = argparse.ArgumentParser(description='peak RSS of lexing a read str vs an mmap')
+    arg_parser.add_argument('file', nargs='?')
+    arg_parser.add_argument('--size', type=float, default=8, help='size of the generated source in MB (default: 8)')
+    arg_parser.add_argument('--full', action='store_true', help='run the whole program with the interpreter instead of only lexing it')
+    args = arg_parser.parse_args()
+
+    path = args.file
+    if path is None:
+        with tempfile.NamedTemporaryFile('w', suffix='.skibidi', delete=False) as file:
+            file.write(generate_source(args.size))
+        path = file.name
+    try:
+        print(f'source: {os.path.getsize(path) / (1024 * 1024):.2f} MB, {"full run" if args.full else "lexing only"}')
+        print(f'{"path":<6} {"seconds":>9} {"peak RSS":>12}')
+        for mode in ['read', 'mmap']:
+            if args.full:
+                command = [sys.executable, os.path.join(root, 'skibidi_interpreter.py'), path, '--no-cache']
+                command += ['--mmap'] if mode == 'mmap' else []
+            else:
+                command = [sys.executable, '-c', lex_script, root, path, mode]
+            seconds, peak = measure(command)
+            print(f'{mode:<6} {seconds:>9.3f} {peak / (1024 * 1024):>9.1f} MB')
+    finally:
+        if args.file is None:
+            os.remove(path)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+# how much faster code_to_lexemes_parallel lexes than code_to_lexemes, for each number of workers
+# usage: python benchmarks/bench_parallel_lex.py [file.skibidi] [--size MB] [--workers 1,2,4,8] [--repeat N]
+import os
+import sys
+import time
+import argparse
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [root, os.path.dirname(os.path.abspath(__file__))]
+
+import skibidi_interpreter
+from skibidi_interpreter import code_to_lexemes, code_to_lexemes_parallel, split_lines, lex_piece
+from lexical import TokenStream, remap_values
+from bench_lexer import generate_source
+
+def best_time(lex, repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        lex()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+# what code_to_lexemes_parallel does in the parent process once the workers have lexed the pieces:
+# merging the constant pools and joining the arrays (the remapping runs on the workers, so it's left
+# out). none of it gets faster with more workers, so serial / this is as fast as it can ever get
+def parent_time(code: str, pieces: int) -> float:
+    streams = [lex_piece(piece) for piece in split_lines(code, pieces)]
+    start = time.perf_counter()
+    lexemes = TokenStream()
+    mappings = [lexemes.add_constants(constants) for _, _, _, constants in streams]
+    seconds = time.perf_counter() - start
+    values = [remap_values(stream[2], mapping) for stream, mapping in zip(streams, mappings)]
+    start = time.perf_counter()
+    for (tokens, lines, _, _), piece_values in zip(streams, values):
+        lexemes.tokens += tokens
+        lexemes.lines += lines
+        lexemes.values += piece_values
+    return seconds + time.perf_counter() - start
+
+def main():
+    arg_parser = argparse.ArgumentParser(description='parallel lexing speedup by number of workers')
+    arg_parser.add_argument('file', nargs='?')
+    arg_parser.add_argument('--size', type=float, default=8, help='size of the generated source in MB (default: 8)')
+    arg_parser.add_argument('--workers', default=','.join(str(2 ** i) for i in range(4)), help='comma separated worker counts (default: 1,2,4,8)')
+    arg_parser.add_argument('--repeat', type=int, default=3, help='runs per worker count, the best one counts (default: 3)')
+    args = arg_parser.parse_args()
+
+    code = open(args.file).read() if args.file else generate_source(args.size)
+    skibidi_interpreter.parallel_lex_threshold = 0 # so small sources are split too
+    serial = best_time(lambda: code_to_lexemes(code, TokenStream()), args.repeat)
+    print(f'source: {len(code.encode()) / (1024 * 1024):.2f} MB on {os.cpu_count()} cpus')
+    print(f'{"workers":>7} {"seconds":>9} {"MB/s":>8} {"speedup":>8}')
+    print(f'{"serial":>7} {serial:>9.3f} {len(code) / (1024 * 1024) / serial:>8.2f} {1:>7.2f}x')
+    counts = [int(count) for count in args.workers.split(',')]
+    for workers in counts:
+        seconds = best_time(lambda: code_to_lexemes_parallel(code, workers), args.repeat)
+        print(f'{workers:>7} {seconds:>9.3f} {len(code) / (1024 * 1024) / seconds:>8.2f} {serial / seconds:>7.2f}x')
+    merge = parent_time(code, max(counts) * 4)
+    print(f'merging in the parent: {merge:.3f}s, so at most {serial / merge:.1f}x with any number of workers')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,147 @@
+# times lexing, parsing and running the workloads in workloads.py separately, and compares the results
+# of two revisions to catch slowdowns
+# usage: python benchmarks/bench_suite.py run [workload ...] [--engine tree|vm|python] [--repeat N] [--output FILE]
+#        python benchmarks/bench_suite.py compare BASELINE.json RESULTS.json [--threshold PERCENT]
+# a workload is a name or name:key=value,..., e.g. nested_loops:depth=4,size=12. see workloads.py
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import contextlib
+import subprocess
+import tracemalloc
+from typing import Callable, Dict
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [root, os.path.dirname(os.path.abspath(__file__))]
+
+from skibidi_interpreter import code_to_lexemes, build_program, run_program, engines
+from workloads import workloads, generate
+
+phases = ['lex', 'parse', 'run']
+
+default_workloads = ['nested_loops', 'elif_chain', 'string_concat', 'string_append', 'large_source']
+
+def revision() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=root, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+# prepare() makes the input for a run outside the timed part (running a program changes its tree,
+# so every run needs a fresh one). the fastest of repeat runs counts
+def best_time(prepare: Callable, phase: Callable, repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        argument = prepare()
+        start = time.perf_counter()
+        phase(argument)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+# measured in its own run, since tracing every allocation slows the phase down a lot
+def peak_memory(prepare: Callable, phase: Callable) -> int:
+    argument = prepare()
+    tracemalloc.start()
+    try:
+        phase(argument)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def bench_workload(spec: str, engine: str, repeat: int, memory: bool) -> Dict[str, Dict]:
+    code, operations = generate(spec)
+    lexemes = code_to_lexemes(code)
+    counts = {'lex': len(lexemes), 'parse': len(lexemes), 'run': operations}
+    steps = {
+        'lex': (lambda: code, code_to_lexemes),
+        'parse': (lambda: lexemes, build_program),
+        'run': (lambda: build_program(lexemes), lambda program: run_program(program, engine)),
+    }
+    results = {}
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        for phase in phases:
+            prepare, run = steps[phase]
+            seconds = best_time(prepare, run, repeat)
+            results[phase] = {
+                'seconds': seconds,
+                'ops': counts[phase],
+                'ops_per_second': counts[phase] / seconds if seconds else 0,
+                'peak_memory': peak_memory(prepare, run) if memory else None,
+            }
+    return results
+
+def format_memory(size: int | None) -> str:
+    return '-' if size is None else f'{size / (1024 * 1024):.2f} MB'
+
+def run(args):
+    specs = args.workloads or default_workloads
+    report = {
+        'revision': revision(),
+        'python': platform.python_version(),
+        'engine': args.engine,
+        'repeat': args.repeat,
+        'workloads': {},
+    }
+    print(f'{"workload":<36} {"phase":<6} {"seconds":>10} {"ops/s":>14} {"peak memory":>12}')
+    for spec in specs:
+        results = bench_workload(spec, args.engine, args.repeat, not args.no_memory)
+        report['workloads'][spec] = results
+        for phase in phases:
+            result = results[phase]
+            print(f'{spec:<36} {phase:<6} {result["seconds"]:>10.4f} {result["ops_per_second"]:>14,.0f} {format_memory(result["peak_memory"]):>12}')
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(report, file, indent=2)
+        print(f'saved to {args.output}')
+
+# exits with 1 when any phase of a workload that's in both files got slower by more than the threshold
+def compare(args):
+    with open(args.baseline) as file:
+        baseline = json.load(file)
+    with open(args.results) as file:
+        results = json.load(file)
+    if baseline.get('engine') != results.get('engine'):
+        print(f'warning: comparing the {baseline.get("engine")} engine with the {results.get("engine")} engine')
+
+    print(f'{baseline.get("revision")} -> {results.get("revision")}, threshold {args.threshold:g}%')
+    print(f'{"workload":<36} {"phase":<6} {"before":>10} {"after":>10} {"change":>9}')
+    regressions = 0
+    for spec, phase_results in results['workloads'].items():
+        if spec not in baseline['workloads']:
+            continue
+        for phase in phases:
+            before = baseline['workloads'][spec][phase]['seconds']
+            after = phase_results[phase]['seconds']
+            change = (after - before) / before * 100 if before else 0
+            slower = change > args.threshold
+            regressions += slower
+            print(f'{spec:<36} {phase:<6} {before:>10.4f} {after:>10.4f} {change:>+8.1f}%{"  SLOWER" if slower else ""}')
+    if regressions:
+        sys.exit(f'{regressions} phase(s) slower by more than {args.threshold:g}%')
+
+def main():
+    arg_parser = argparse.ArgumentParser(description='benchmark suite for the interpreter')
+    commands = arg_parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help='time the workloads')
+    run_parser.add_argument('workloads', nargs='*', help=f'workloads to run (default: all of {", ".join(workloads)})')
+    run_parser.add_argument('--engine', choices=engines, default='tree', help='how to run the programs (default: tree)')
+    run_parser.add_argument('--repeat', type=int, default=3, help='runs per phase, the fastest one counts (default: 3)')
+    run_parser.add_argument('--no-memory', action='store_true', help="don't measure peak memory, which needs an extra traced run per phase")
+    run_parser.add_argument('--output', help='save the results to this JSON file, to compare against later')
+    run_parser.set_defaults(handler=run)
+
+    compare_parser = commands.add_parser('compare', help='flag slowdowns between two saved results')
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('results')
+    compare_parser.add_argument('--threshold', type=float, default=10, help='percent slower that counts as a regression (default: 10)')
+    compare_parser.set_defaults(handler=compare)
+
+    args = arg_parser.parse_args()
+    args.handler(args)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+# compares how much memory the lexemes of a program take as the original dataclass with a __dict__,
+# as the current __slots__ Lexeme and as a TokenStream
+# usage: python benchmarks/bench_tokens.py [file.skibidi] [--size MB]
+import os
+import sys
+import tracemalloc
+import argparse
+from dataclasses import dataclass, field
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [root, os.path.dirname(os.path.abspath(__file__))]
+
+from lexical import Lexeme, Token, TokenStream
+from skibidi_interpreter import code_to_lexemes
+from bench_lexer import generate_source
+
+# what Lexeme used to be
+@dataclass
+class DictLexeme:
+    lexeme: str | int | bool | float = field(default=None)
+    token: Token = field(default=None)
+    line: int = field(default=0)
+
+# memory still allocated after build() returns, and the peak while it ran
+def measure(build):
+    tracemalloc.start()
+    result = build()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return current, peak
+
+def main():
+    arg_parser = argparse.ArgumentParser(description='memory used by the lexemes of a program')
+    arg_parser.add_argument('file', nargs='?')
+    arg_parser.add_argument('--size', type=float, default=2, help='size of the generated source in MB (default: 2)')
+    args = arg_parser.parse_args()
+
+    code = open(args.file).read() if args.file else generate_source(args.size)
+    count = len(code_to_lexemes(code))
+    print(f'source: {len(code.encode()) / (1024 * 1024):.2f} MB, {count} lexemes')
+    results = [
+        ('dataclass with __dict__', lambda: [DictLexeme(lex.lexeme, lex.token, lex.line) for lex in code_to_lexemes(code)]),
+        ('dataclass with __slots__', lambda: code_to_lexemes(code)),
+        ('TokenStream', lambda: code_to_lexemes(code, TokenStream())),
+    ]
+    for name, build in results:
+        current, peak = measure(build)
+        print(f'{name:<26} {current / (1024 * 1024):8.2f} MB kept ({current / count:6.1f} bytes/lexeme), {peak / (1024 * 1024):8.2f} MB peak')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+# generated programs for bench_suite.py. every workload takes its size as keyword arguments and returns
+# the source along with how many operations running it performs (loop iterations, mostly), which is
+# what ops/s for the run phase is counted in
+from typing import Callable, Dict, Tuple
+
+def nested_loops(depth: int = 3, size: int = 40) -> Tuple[str, int]:
+    lines = ['var total = 0']
+    for level in range(depth):
+        indent = '    ' * level
+        lines.append(f'{indent}for (var i{level} = 0; i{level} < {size}; i{level} = i{level} + 1)')
+    lines.append('    ' * depth + 'total = total + 1')
+    for level in reversed(range(depth)):
+        lines.append('    ' * level + 'end')
+    lines.append('print(total)')
+    return '\n'.join(lines) + '\n', size ** depth
+
+# one loop that loops.counted_loop turns into a range(), and the same loop written with while, which
+# every engine has to run the condition and the update of
+def counted_loop(iterations: int = 1000000) -> Tuple[str, int]:
+    source = f'''var total = 0
+for (var i = 0; i < {iterations}; i = i + 1)
+    total = total + i
+end
+print(total)
+'''
+    return source, iterations
+
+def while_loop(iterations: int = 1000000) -> Tuple[str, int]:
+    source = f'''var total = 0
+var i = 0
+while (i < {iterations})
+    total = total + i
+    i = i + 1
+end
+print(total)
+'''
+    return source, iterations
+
+# every iteration goes down the chain until it finds the arm for n % length
+def elif_chain(length: int = 50, iterations: int = 20000) -> Tuple[str, int]:
+    lines = ['var hits = 0', f'for (var n = 0; n < {iterations}; n = n + 1)']
+    for arm in range(length):
+        keyword = 'if' if arm == 0 else 'elif'
+        lines.append(f'    {keyword} (n % {length} == {arm})')
+        lines.append(f'        hits = hits + {arm}')
+    lines += ['    end', 'end', 'print(hits)']
+    return '\n'.join(lines) + '\n', iterations
+
+# the line being built is reset every width iterations so the output doesn't grow quadratically
+def string_concat(iterations: int = 20000, width: int = 100) -> Tuple[str, int]:
+    source = f'''var line = ""
+for (var i = 0; i < {iterations}; i = i + 1)
+    if (i % {width} == 0)
+        line = ""
+    end
+    line = line + "ab"
+    print("line " + i + ": " + line)
+end
+'''
+    return source, iterations
+
+# one string built up by appending to it, which takes quadratic time without ropes (see rope.py).
+# try iterations=1000000 too
+def string_append(iterations: int = 100000) -> Tuple[str, int]:
+    source = f'''var text = ""
+for (var i = 0; i < {iterations}; i = i + 1)
+    text = text + i + ","
+end
+print(text)
+'''
+    return source, iterations
+
+# a few MB of short independent blocks, for the phases that scale with the size of the source.
+# each block has its own scope so the same names can be declared in all of them
+def large_source(size_mb: float = 4) -> Tuple[str, int]:
+    block = '''if (true)
+    var count = 0
+    for (var i = 0; i < 3; i = i + 1)
+        if (i % 3 == 0 and i % 5 == 0)
+            count = count + 15
+        elif (i % 3 == 0)
+            count = count + 3
+        else
+            count = count + 1
+        end
+    end
+    var message = "count " + count + " at " + 2 * 3.5
+end
+'''
+    blocks = max(1, int(size_mb * 1024 * 1024 / len(block)))
+    return block * blocks, blocks * 3
+
+workloads: Dict[str, Callable[..., Tuple[str, int]]] = {
+    'nested_loops': nested_loops,
+    'counted_loop': counted_loop,
+    'while_loop': while_loop,
+    'elif_chain': elif_chain,
+    'string_concat': string_concat,
+    'string_append': string_append,
+    'large_source': large_source,
+}
+
+# "name" or "name:key=value,key=value", e.g. "nested_loops:depth=4,size=12"
+def parse_spec(spec: str) -> Tuple[str, Dict[str, int | float]]:
+    name, _, arguments = spec.partition(':')
+    if name not in workloads:
+        raise ValueError(f'unknown workload "{name}" (expected one of {", ".join(workloads)})')
+    params = {}
+    for argument in filter(None, arguments.split(',')):
+        key, _, value = argument.partition('=')
+        params[key.strip()] = float(value) if '.' in value else int(value)
+    return name, params
+
+def generate(spec: str) -> Tuple[str, int]:
+    name, params = parse_spec(spec)
+    return workloads[name](**params)
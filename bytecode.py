@@ -0,0 +1,216 @@
+from dataclasses import dataclass, field
+from typing import Callable, List, Tuple
+from syntax_tree import Node, Literal, Name, UnaryOp, BinaryOp, Declare, Assign, Print, If, While, For, Program
+from operations import specialize
+from loops import CountedLoop, counted_loop
+
+# opcodes are plain ints (not an Enum) so the vm's dispatch loop only does int comparisons.
+# the program is resolved before it's compiled, so variables are addressed by their slot in
+# VarMap.values and scopes don't need any instructions of their own.
+# every instruction the vm dispatches costs about as much as a whole closure call in the tree engine,
+# so the common shapes of code get instructions of their own that do more at once: a binary operator
+# with a literal or a variable on its right, and a counted loop (see loops.py)
+LOAD_CONST = 0       # push constants[arg]
+LOAD_NAME = 1        # push the value in slot arg
+STORE_NAME = 2       # pop into slot arg (both declarations and assignments)
+UNARY_NOT = 3        # replace the top of the stack with its negation
+BINARY_OP = 4        # pop two values, push operations[arg] applied to them
+JUMP_IF_FALSE = 5    # pop, jump to arg if False. anything but a bool is an error (if statements)
+JUMP_IF_NOT_TRUE = 6 # pop, jump to arg unless it is True (loop conditions)
+JUMP = 7             # jump to arg
+PRINT = 8            # print the popped value, or an empty line if arg is 0
+BINARY_OP_CONST = 9  # replace the top of the stack with operations[arg] applied to it and the operation's operand
+BINARY_OP_NAME = 10  # the same with the value in the operand's slot
+GET_RANGE = 11       # pop bound and start and make the range ranges[arg] counts over
+FOR_RANGE = 12       # put the next number of ranges[arg] in its slot and jump to its body, or go on when it's done
+
+opnames = ['LOAD_CONST', 'LOAD_NAME', 'STORE_NAME', 'UNARY_NOT', 'BINARY_OP',
+           'JUMP_IF_FALSE', 'JUMP_IF_NOT_TRUE', 'JUMP', 'PRINT', 'BINARY_OP_CONST',
+           'BINARY_OP_NAME', 'GET_RANGE', 'FOR_RANGE']
+jumps = [JUMP_IF_FALSE, JUMP_IF_NOT_TRUE, JUMP]
+
+# instructions is a flat list of opcode, argument pairs, so the instruction at offset i is
+# instructions[i] with argument instructions[i+1]. lines[i // 2] is its source line.
+# operations holds (symbol, operation, operand) for every binary operator, with the operation picked
+# by operations.specialize like the tree engine does. the operand is the value or slot of the right
+# side for BINARY_OP_CONST and BINARY_OP_NAME.
+# ranges holds (slot, step, bound adjustment, body offset) for every counted loop: the range goes up
+# to the bound plus the adjustment, which is what makes <= and >= loops include it.
+# names only exists for the disassembler: names[slot] lists the variables stored in that slot
+@dataclass
+class Code:
+    instructions: List[int] = field(default_factory=list)
+    constants: List = field(default_factory=list)
+    operations: List[Tuple[str, Callable, object]] = field(default_factory=list)
+    ranges: List[Tuple[int, int, int, int]] = field(default_factory=list)
+    names: List[List[str]] = field(default_factory=list)
+    lines: List[int] = field(default_factory=list)
+
+class BytecodeCompiler(object):
+    def __init__(self):
+        self.code = Code()
+
+    def compile(self, program: Program) -> Code:
+        self.compile_block(program.body)
+        return self.code
+
+    def emit(self, opcode: int, arg: int, line: int) -> int:
+        self.code.instructions += [opcode, arg]
+        self.code.lines.append(line)
+        return len(self.code.instructions) - 2
+
+    # points an already emitted jump at the next instruction to be emitted
+    def patch(self, offset: int):
+        self.code.instructions[offset+1] = len(self.code.instructions)
+
+    def here(self) -> int:
+        return len(self.code.instructions)
+
+    def constant(self, value) -> int:
+        # "1 == true" is True in python, so constants are matched on type as well as value
+        for i, constant in enumerate(self.code.constants):
+            if type(constant) is type(value) and constant == value:
+                return i
+        self.code.constants.append(value)
+        return len(self.code.constants) - 1
+
+    def operation(self, expression: BinaryOp, operand=None) -> int:
+        operation = specialize(expression.operator, expression.left.types, expression.right.types)
+        self.code.operations.append((expression.operator, operation, operand))
+        return len(self.code.operations) - 1
+
+    def slot(self, node: Name | Declare | Assign) -> int:
+        while len(self.code.names) <= node.slot:
+            self.code.names.append([])
+        if node.name not in self.code.names[node.slot]:
+            self.code.names[node.slot].append(node.name)
+        return node.slot
+
+    def compile_block(self, statements: List[Node]):
+        for statement in statements:
+            self.compile_statement(statement)
+
+    def compile_statement(self, statement: Node):
+        match statement:
+            case Declare() | Assign():
+                self.compile_expression(statement.value)
+                self.emit(STORE_NAME, self.slot(statement), statement.line)
+            case Print() if statement.value is None:
+                self.emit(PRINT, 0, statement.line)
+            case Print():
+                self.compile_expression(statement.value)
+                self.emit(PRINT, 1, statement.line)
+            case If():
+                self.compile_if(statement)
+            case While():
+                self.compile_while(statement)
+            case For():
+                self.compile_for(statement)
+
+    def compile_if(self, node: If):
+        exits = []
+        for branch in node.branches:
+            self.compile_expression(branch.condition)
+            skip = self.emit(JUMP_IF_FALSE, 0, branch.line)
+            self.compile_block(branch.body)
+            exits.append(self.emit(JUMP, 0, branch.line))
+            self.patch(skip)
+        if node.orelse is not None:
+            self.compile_block(node.orelse)
+        for offset in exits:
+            self.patch(offset)
+
+    def compile_while(self, node: While):
+        top = self.here()
+        self.compile_expression(node.condition)
+        loop_exit = self.emit(JUMP_IF_NOT_TRUE, 0, node.line)
+        self.compile_block(node.body)
+        self.emit(JUMP, top, node.line)
+        self.patch(loop_exit)
+
+    def compile_for(self, node: For):
+        loop = counted_loop(node)
+        if loop is not None:
+            self.compile_counted_for(node, loop)
+            return
+        self.compile_statement(node.init)
+        top = self.here()
+        self.compile_expression(node.condition)
+        loop_exit = self.emit(JUMP_IF_NOT_TRUE, 0, node.line)
+        self.compile_block(node.body)
+        self.compile_statement(node.update)
+        self.emit(JUMP, top, node.line)
+        self.patch(loop_exit)
+
+    # the loop's test goes after its body, so an iteration is the body and one FOR_RANGE
+    def compile_counted_for(self, node: For, loop: CountedLoop):
+        self.compile_expression(loop.start)
+        self.compile_expression(loop.bound)
+        self.slot(node.init)
+        number = len(self.code.ranges)
+        # taken before the body, which can have counted loops of its own
+        self.code.ranges.append(None)
+        self.emit(GET_RANGE, number, node.line)
+        test = self.emit(JUMP, 0, node.line)
+        body = self.here()
+        self.compile_block(node.body)
+        self.patch(test)
+        self.emit(FOR_RANGE, number, node.line)
+        self.code.ranges[number] = (loop.slot, loop.step, loop.stop(0), body)
+
+    def compile_expression(self, expression: Node):
+        match expression:
+            case Literal():
+                self.emit(LOAD_CONST, self.constant(expression.value), expression.line)
+            case Name():
+                self.emit(LOAD_NAME, self.slot(expression), expression.line)
+            case UnaryOp():
+                self.compile_expression(expression.operand)
+                self.emit(UNARY_NOT, 0, expression.line)
+            case BinaryOp():
+                # expressions can't change anything, so the right side can just as well be read after the left
+                self.compile_expression(expression.left)
+                right = expression.right
+                if type(right) is Literal:
+                    self.emit(BINARY_OP_CONST, self.operation(expression, right.value), expression.line)
+                elif type(right) is Name:
+                    self.emit(BINARY_OP_NAME, self.operation(expression, self.slot(right)), expression.line)
+                else:
+                    self.compile_expression(right)
+                    self.emit(BINARY_OP, self.operation(expression), expression.line)
+
+# program has to be resolved first (see resolver.py)
+def compile_program(program: Program) -> Code:
+    return BytecodeCompiler().compile(program)
+
+def disassemble(code: Code) -> str:
+    rows = []
+    last_line = None
+    for offset in range(0, len(code.instructions), 2):
+        opcode = code.instructions[offset]
+        arg = code.instructions[offset+1]
+        line = code.lines[offset // 2]
+        if opcode == LOAD_CONST:
+            detail = repr(code.constants[arg])
+        elif opcode in [LOAD_NAME, STORE_NAME]:
+            detail = '/'.join(code.names[arg])
+        elif opcode == BINARY_OP:
+            detail = code.operations[arg][0]
+        elif opcode == BINARY_OP_CONST:
+            symbol, _, operand = code.operations[arg]
+            detail = f'{symbol} {operand!r}'
+        elif opcode == BINARY_OP_NAME:
+            symbol, _, operand = code.operations[arg]
+            detail = f'{symbol} {"/".join(code.names[operand])}'
+        elif opcode in [GET_RANGE, FOR_RANGE]:
+            slot, step, adjustment, body = code.ranges[arg]
+            detail = f'{"/".join(code.names[slot])} by {step}' + (f', body at {body}' if opcode == FOR_RANGE else '')
+        elif opcode in jumps:
+            detail = f'to {arg}'
+        else:
+            detail = ''
+        line_column = str(line) if line != last_line else ''
+        last_line = line
+        row = f'{line_column:>5} {offset:>6} {opnames[opcode]:<17} {arg:<4}'
+        rows.append(f'{row} ({detail})' if detail else row.rstrip())
+    return '\n'.join(rows)
@@ -0,0 +1,155 @@
+from typing import Callable, List
+from syntax_tree import Node, Literal, Name, UnaryOp, BinaryOp, Declare, Assign, Print, Branch, If, While, For, Program
+from operations import specialize
+from varmap import VarMap
+from loops import CountedLoop, counted_loop
+from output import Output
+
+# compiles the tree built by the parser into nested python closures, then runs them.
+# every expression is turned into a closure once, so evaluating it only calls its operands
+# and applies the operator instead of walking the tree again.
+# the program has to be resolved against varmap first (see resolver.py): variables are read and
+# written straight through their slots in varmap.values, and the scopes only exist at resolve time
+class Evaluator(object):
+    # whether loops that just count run with range() (see loops.py). they skip the loop's condition,
+    # so subclasses that hook into it turn this off
+    counted_loops = True
+
+    def __init__(self, varmap: VarMap = None, output: Output = None):
+        self.varmap = varmap if varmap is not None else VarMap()
+        self.values = self.varmap.values
+        self.output = output if output is not None else Output()
+
+    def run(self, program: Program):
+        execute = self.compile(program)
+        try:
+            execute()
+        finally:
+            self.output.flush()
+
+    def compile(self, program: Program) -> Callable:
+        return self.compile_block(program.body)
+
+    def compile_block(self, statements: List[Node]) -> Callable:
+        compiled = [self.compile_statement(statement) for statement in statements]
+        def execute():
+            for statement in compiled:
+                statement()
+        return execute
+
+    def compile_statement(self, statement: Node) -> Callable:
+        match statement:
+            case Declare():
+                return self.compile_declare(statement)
+            case Assign():
+                return self.compile_assign(statement)
+            case Print():
+                return self.compile_print(statement)
+            case If():
+                return self.compile_if(statement)
+            case While():
+                return self.compile_while(statement)
+            case For():
+                return self.compile_for(statement)
+            case _:
+                return lambda: None
+
+    # declaring and assigning only differ at resolve time
+    def compile_declare(self, node: Declare | Assign) -> Callable:
+        values = self.values
+        slot = node.slot
+        value = self.compile_expression(node.value)
+        def execute():
+            values[slot] = value()
+        return execute
+
+    def compile_assign(self, node: Assign) -> Callable:
+        return self.compile_declare(node)
+
+    def compile_print(self, node: Print) -> Callable:
+        write = self.output.write
+        if node.value is None:
+            return lambda: write('\n')
+        value = self.compile_expression(node.value)
+        return lambda: write(f'{value()}\n')
+
+    def compile_if(self, node: If) -> Callable:
+        branches = [(self.compile_branch_condition(node, branch), self.compile_block(branch.body), branch.line) for branch in node.branches]
+        orelse = self.compile_block(node.orelse) if node.orelse is not None else None
+        def execute():
+            for condition, body, line in branches:
+                value = condition()
+                if value is True:
+                    body()
+                    return
+                elif value is not False:
+                    raise TypeError(f'Line {line}: expected boolean expression in "if" statement')
+            if orelse is not None:
+                orelse()
+        return execute
+
+    def compile_while(self, node: While) -> Callable:
+        condition = self.compile_loop_condition(node)
+        body = self.compile_block(node.body)
+        def execute():
+            while condition() is True:
+                body()
+        return execute
+
+    def compile_for(self, node: For) -> Callable:
+        loop = counted_loop(node) if self.counted_loops else None
+        if loop is not None:
+            return self.compile_counted_for(node, loop)
+        init = self.compile_statement(node.init)
+        condition = self.compile_loop_condition(node)
+        update = self.compile_statement(node.update)
+        body = self.compile_block(node.body)
+        def execute():
+            init()
+            while condition() is True:
+                body()
+                update()
+        return execute
+
+    def compile_counted_for(self, node: For, loop: CountedLoop) -> Callable:
+        values = self.values
+        slot = loop.slot
+        start = self.compile_expression(loop.start)
+        bound = self.compile_expression(loop.bound)
+        step = loop.step
+        stop = loop.stop
+        body = self.compile_block(node.body)
+        def execute():
+            for value in range(start(), stop(bound()), step):
+                values[slot] = value
+                body()
+        return execute
+
+    # checked for every branch of an if statement until one is taken
+    def compile_branch_condition(self, node: If, branch: Branch) -> Callable:
+        return self.compile_expression(branch.condition)
+
+    # checked before every iteration of a loop
+    def compile_loop_condition(self, node: While | For) -> Callable:
+        return self.compile_expression(node.condition)
+
+    def compile_expression(self, expression: Node) -> Callable:
+        match expression:
+            case Literal():
+                value = expression.value
+                return lambda: value
+            case Name():
+                return self.compile_name(expression)
+            case UnaryOp():
+                operand = self.compile_expression(expression.operand)
+                return lambda: not operand()
+            case BinaryOp():
+                left = self.compile_expression(expression.left)
+                right = self.compile_expression(expression.right)
+                apply = specialize(expression.operator, expression.left.types, expression.right.types)
+                return lambda: apply(left(), right())
+
+    def compile_name(self, expression: Name) -> Callable:
+        values = self.values
+        slot = expression.slot
+        return lambda: values[slot]
@@ -0,0 +1,107 @@
+from typing import Dict, List
+from syntax_tree import Node, Literal, Name, UnaryOp, BinaryOp, Declare, Assign, Print, If, While, For, Program
+from operations import comparisons
+from varmap import VarMap
+from rope import Rope
+
+# the types a value of the language can be
+every_type = frozenset([int, float, bool, str])
+
+# works out which types every expression in a resolved program can have, and writes them to the
+# expressions' types, so the engines can pick an operation that skips the checks the generic one does
+# (see operations.specialize). it doesn't follow the order statements run in: a slot can have any
+# type that's stored in it anywhere in the program, and whatever type it holds from before the
+# program. that's always safe, and loop counters and the like still come out as plain ints
+class Inference(object):
+    def __init__(self, varmap: VarMap = None):
+        self.slots: Dict[int, frozenset] = {}
+        if varmap is not None:
+            # values left by programs that ran before this one
+            for slot, value in enumerate(varmap.values):
+                if value is not None:
+                    self.slots[slot] = frozenset([str if type(value) is Rope else type(value)])
+        self.changed = False
+        self.unset: set = set() # slots that are read but have nothing stored in them
+
+    def infer(self, program: Program) -> Program:
+        # every pass can only add types to a slot, so this stops after a few passes
+        self.changed = True
+        while self.changed:
+            self.changed = False
+            self.infer_block(program.body)
+            # only a variable whose declaration never ran in an earlier program gets here. it
+            # holds None, so it's left to the generic operations
+            for slot in self.unset:
+                self.store(slot, every_type)
+            self.unset.clear()
+        return program
+
+    def store(self, slot: int, types: frozenset):
+        known = self.slots.get(slot, frozenset())
+        if not types <= known:
+            self.slots[slot] = known | types
+            self.changed = True
+
+    def infer_block(self, statements: List[Node]):
+        for statement in statements:
+            self.infer_statement(statement)
+
+    def infer_statement(self, statement: Node):
+        match statement:
+            case Declare() | Assign():
+                self.store(statement.slot, self.infer_expression(statement.value))
+            case Print() if statement.value is not None:
+                self.infer_expression(statement.value)
+            case If():
+                for branch in statement.branches:
+                    self.infer_expression(branch.condition)
+                    self.infer_block(branch.body)
+                if statement.orelse is not None:
+                    self.infer_block(statement.orelse)
+            case While():
+                self.infer_expression(statement.condition)
+                self.infer_block(statement.body)
+            case For():
+                self.infer_statement(statement.init)
+                self.infer_expression(statement.condition)
+                self.infer_block(statement.body)
+                self.infer_statement(statement.update)
+
+    def infer_expression(self, expression: Node) -> frozenset:
+        match expression:
+            case Literal():
+                types = frozenset([type(expression.value)])
+            case Name():
+                types = self.slots.get(expression.slot, frozenset())
+                if not types:
+                    self.unset.add(expression.slot)
+            case UnaryOp():
+                self.infer_expression(expression.operand)
+                types = frozenset([bool])
+            case BinaryOp():
+                left = self.infer_expression(expression.left)
+                right = self.infer_expression(expression.right)
+                types = frozenset().union(*[result_types(expression.operator, term1, term2) for term1 in left for term2 in right])
+            case _:
+                types = every_type
+        expression.types = types
+        return types
+
+# the types symbol can give back for a left operand of type term1 and a right one of type term2
+def result_types(symbol: str, term1: type, term2: type) -> frozenset:
+    if symbol in comparisons:
+        return frozenset([bool])
+    if term1 is str or term2 is str:
+        return frozenset([str])
+    if symbol in ['and', 'or']:
+        types = frozenset([term1, term2]) # they give back one of their operands
+    elif term1 is float or term2 is float or symbol == '/':
+        types = frozenset([float])
+    else:
+        types = frozenset([int]) # bools count as ints in arithmetic
+    # a float that comes out as a whole number becomes an int
+    return types | frozenset([int]) if float in types else types
+
+# program has to be resolved first (see resolver.py). varmap is the one it was resolved against
+def infer(program: Program, varmap: VarMap = None) -> Program:
+    return Inference(varmap).infer(program)
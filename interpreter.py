@@ -0,0 +1,182 @@
+import time
+import asyncio
+from typing import Callable
+from syntax_tree import Program, While, For
+from skibidi_interpreter import code_to_lexemes, build_program
+from resolver import resolve
+from optimizer import optimize
+from evaluator import Evaluator
+from bytecode import Code, compile_program
+from vm import VirtualMachine
+from transpiler import transpile, PythonRunner
+from varmap import VarMap
+from output import Output, CollectedOutput
+from metrics import Metrics, MetricsEvaluator, timed
+
+# raised when a program runs past max_steps or max_time
+class LimitExceeded(RuntimeError):
+    pass
+
+# counts steps and raises LimitExceeded once there have been too many, or time has run out.
+# straight line code always finishes, so loops are the only thing that can keep a program running,
+# and a step is one iteration of one: a loop condition that came out true. the check happens before
+# the body runs, so with max_steps=n a program can run n iterations in all, on either engine
+class Limits(object):
+    def __init__(self, max_steps: int = None, max_time: float = None):
+        self.reset(max_steps, max_time)
+
+    # starts over with new limits, for running a program compiled against these ones again
+    def reset(self, max_steps: int = None, max_time: float = None):
+        self.max_steps = max_steps
+        self.deadline = time.monotonic() + max_time if max_time is not None else None
+        self.max_time = max_time
+        self.steps = 0
+
+    def step(self, count: int, line: int):
+        self.steps += count
+        if self.max_steps is not None and self.steps > self.max_steps:
+            raise LimitExceeded(f'Line {line}: ran for more than {self.max_steps} steps')
+        if self.deadline is not None and time.monotonic() > self.deadline:
+            raise LimitExceeded(f'Line {line}: ran for more than {self.max_time:g} seconds')
+
+    # how many steps the vm can take before the limits have to be checked again: at most size, and
+    # no more than the step that would go over max_steps
+    def next_slice(self, size: int) -> int:
+        if self.max_steps is None:
+            return size
+        return min(size, self.max_steps - self.steps + 1)
+
+    # runs code on machine from pc for up to slice_size iterations, then checks the limits. returns
+    # where it stopped, which is len(code.instructions) once the program is done
+    def run_slice(self, machine: VirtualMachine, code: Code, pc: int, slice_size: int) -> int:
+        count = self.next_slice(slice_size)
+        pc = machine.execute(code, pc, count)
+        if pc < len(code.instructions):
+            # pc is the start of a loop body, right after the loop's condition
+            self.step(count, code.lines[pc // 2 - 1])
+        return pc
+
+# checks the limits once per loop iteration (see Limits)
+class LimitedEvaluator(Evaluator):
+    counted_loops = False
+
+    def __init__(self, varmap: VarMap = None, output: Output = None, max_steps: int = None, max_time: float = None):
+        super().__init__(varmap, output)
+        self.limits = Limits(max_steps, max_time)
+
+    def compile_loop_condition(self, node: While | For) -> Callable:
+        condition = super().compile_loop_condition(node)
+        step = self.limits.step
+        line = node.line
+        def limited():
+            value = condition()
+            if value is True:
+                step(1, line)
+            return value
+        return limited
+
+# both at once, for limited runs with metrics on
+class LimitedMetricsEvaluator(LimitedEvaluator, MetricsEvaluator):
+    def __init__(self, varmap: VarMap = None, output: Output = None, max_steps: int = None, max_time: float = None, metrics: Metrics = None):
+        super().__init__(varmap, output, max_steps, max_time)
+        self.metrics = metrics if metrics is not None else Metrics()
+
+# runs programs with state of its own, so any number of them can be used side by side in one process.
+# variables declared by one run are still there for the next, like the statements of a stream.
+# everything printed goes to output, which collects it in memory unless another sink is given.
+# with metrics=True, self.metrics adds up what every run did (see metrics.py), as_dict() gives it.
+# run_async only works with the vm engine, which can stop between loop iterations to let other tasks run
+class Interpreter(object):
+    def __init__(self, output: Output = None, engine: str = 'tree', opt_level: int = 1, metrics: bool = False):
+        self.varmap = VarMap()
+        self.output = output if output is not None else CollectedOutput()
+        self.engine = engine
+        self.opt_level = opt_level
+        self.metrics = Metrics() if metrics else None
+
+    # a program with an error in it leaves the variables as they were, so the next run can declare its names
+    def compile(self, source: str) -> Program:
+        saved = self.varmap.save()
+        metrics = self.metrics
+        try:
+            with timed(metrics, 'lex'):
+                lexemes = code_to_lexemes(source)
+            with timed(metrics, 'parse'):
+                program = build_program(lexemes)
+            with timed(metrics, 'compile'):
+                program = optimize(resolve(program, self.varmap), self.opt_level, self.varmap)
+            if metrics is not None:
+                metrics.record_scopes(self.varmap)
+            return program
+        except Exception:
+            self.varmap.restore(saved)
+            raise
+
+    # max_steps limits how many loop iterations the program can run and max_time how many seconds,
+    # after which it stops with LimitExceeded. the python engine can't be limited.
+    # a program that fails while running is undone like one that fails to compile, except for what it
+    # printed and the values it had already given variables from before it
+    def run(self, source: str, max_steps: int = None, max_time: float = None):
+        saved = self.varmap.save()
+        program = self.compile(source)
+        try:
+            with timed(self.metrics, 'execute'):
+                self.execute(program, max_steps, max_time)
+        except BaseException:
+            self.varmap.restore(saved)
+            raise
+
+    def execute(self, program: Program, max_steps: int = None, max_time: float = None):
+        limited = max_steps is not None or max_time is not None
+        if self.engine == 'vm':
+            limits = Limits(max_steps, max_time)
+            code = compile_program(program)
+            machine = VirtualMachine(self.varmap, self.output)
+            try:
+                if not limited:
+                    machine.execute(code)
+                    return
+                # checking the limits every 256 iterations instead of every one keeps the vm's loop tight
+                pc = 0
+                while pc < len(code.instructions):
+                    pc = limits.run_slice(machine, code, pc, 256)
+            finally:
+                self.output.flush()
+        elif self.engine == 'python':
+            if limited:
+                raise ValueError('max_steps and max_time only work with the tree and vm engines')
+            PythonRunner(self.varmap, self.output).run(transpile(program, self.varmap))
+        elif limited and self.metrics is not None:
+            LimitedMetricsEvaluator(self.varmap, self.output, max_steps, max_time, self.metrics).run(program)
+        elif limited:
+            LimitedEvaluator(self.varmap, self.output, max_steps, max_time).run(program)
+        elif self.metrics is not None:
+            MetricsEvaluator(self.varmap, self.output, self.metrics).run(program)
+        else:
+            Evaluator(self.varmap, self.output).run(program)
+
+    # runs on the vm and lets the event loop run other tasks every yield_every loop iterations, so a
+    # program stuck in a loop doesn't hold up the rest. the limits work the same as in run()
+    async def run_async(self, source: str, max_steps: int = None, max_time: float = None, yield_every: int = 1000):
+        if self.engine != 'vm':
+            raise ValueError('run_async only works with the vm engine')
+        saved = self.varmap.save()
+        program = self.compile(source)
+        with timed(self.metrics, 'compile'):
+            code = compile_program(program)
+        machine = VirtualMachine(self.varmap, self.output)
+        limits = Limits(max_steps, max_time)
+        pc = 0
+        # time spent waiting on other tasks counts towards execute too
+        with timed(self.metrics, 'execute'):
+            try:
+                while True:
+                    pc = limits.run_slice(machine, code, pc, yield_every)
+                    if pc >= len(code.instructions):
+                        return
+                    await asyncio.sleep(0)
+            except BaseException:
+                self.varmap.restore(saved)
+                raise
+            finally:
+                self.output.flush()
@@ -1,5 +1,7 @@
+from array import array
 from dataclasses import dataclass, field
 from enum import Enum
+from typing import Any, Dict, Iterable, List, Tuple
 
 class Token(Enum):
     IDENTIFIER = 1
@@ -9,33 +11,105 @@ class Token(Enum):
     PUNCTUATOR = 5
     NEWLINE = 6
 
-@dataclass
+# operators with a higher number have higher precedence
+precedence = {
+    '*': 5,
+    '/': 5,
+    '%': 5,
+    '+': 4,
+    '-': 4,
+    '<': 3,
+    '<=': 3,
+    '>': 3,
+    '>=': 3,
+    '!=': 3,
+    '==': 3,
+    '!': 2,
+    'and': 1,
+    'or': 0
+}
+
+# slots=True so each lexeme is a small fixed size object instead of carrying a __dict__
+@dataclass(slots=True)
 class Lexeme:
     lexeme: str | int | bool | float = field(default=None)
     token: Token = field(default=None)
     line: int = field(default=0)
 
-    # returns True if operator1 has lower precedence than operator2
+    # returns True if operator1 has higher precedence than operator2
     @staticmethod
     def has_higher_precedence(operator1: str, operator2: str):
-        # operators with a higher number have higher precedence
-        precedence = {
-            '*': 5,
-            '/': 5,
-            '%': 5,
-            '+': 4,
-            '-': 4,
-            '<': 3,
-            '<=': 3,
-            '>': 3,
-            '>=': 3,
-            '!=': 3,
-            '==': 3,
-            '!': 2,
-            'and': 1,
-            'or': 0
-        }
         return precedence[operator1] > precedence[operator2]
 
     def __repr__(self) -> str:
-        return f"({self.token}: {repr(self.lexeme)}, line {self.line})"
\ No newline at end of file
+        return f"({self.token}: {repr(self.lexeme)}, line {self.line})"
+
+tokens_by_value = {token.value: token for token in Token}
+
+# a struct of arrays version of List[Lexeme] for keeping lots of lexemes around: each lexeme costs
+# a byte for its token, four for its line and four for the index of its value in the constants
+# pool, where repeated identifiers and literals share one entry. indexing it gives back a Lexeme,
+# so the parser can use it the same way as a list
+class TokenStream(object):
+    def __init__(self, lexemes: Iterable[Lexeme] = ()):
+        self.tokens = array('B')
+        self.lines = array('I')
+        self.values = array('I')
+        self.constants: List = []
+        # keyed on the type as well, since 1, 1.0 and True are equal in python
+        self.constant_indexes: Dict[Tuple[type, Any], int] = {}
+        for lex in lexemes:
+            self.append(lex)
+
+    def append(self, lex: Lexeme):
+        key = (type(lex.lexeme), lex.lexeme)
+        index = self.constant_indexes.get(key)
+        if index is None:
+            index = len(self.constants)
+            self.constants.append(lex.lexeme)
+            self.constant_indexes[key] = index
+        self.tokens.append(lex.token.value)
+        self.lines.append(lex.line)
+        self.values.append(index)
+
+    # adds the constants that aren't in the pool yet and returns the index each one has in it
+    def add_constants(self, constants: List) -> List[int]:
+        indexes = []
+        for constant in constants:
+            key = (type(constant), constant)
+            index = self.constant_indexes.get(key)
+            if index is None:
+                index = len(self.constants)
+                self.constants.append(constant)
+                self.constant_indexes[key] = index
+            indexes.append(index)
+        return indexes
+
+    # appends every lexeme of other, with line_offset added to their lines
+    def extend(self, other: 'TokenStream', line_offset: int = 0):
+        indexes = self.add_constants(other.constants)
+        self.tokens += other.tokens
+        self.lines += array('I', map(line_offset.__add__, other.lines)) if line_offset else other.lines
+        self.values += remap_values(other.values, indexes)
+
+    def __len__(self) -> int:
+        return len(self.tokens)
+
+    def __getitem__(self, index: int | slice) -> Lexeme | List[Lexeme]:
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        return Lexeme(self.constants[self.values[index]], tokens_by_value[self.tokens[index]], self.lines[index])
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def __repr__(self) -> str:
+        return f'TokenStream({list(self)})'
+
+# values with every constant index i replaced by indexes[i]. map() over C level callables keeps
+# python out of the per lexeme work, and values is returned as it is when nothing moves
+def remap_values(values: array, indexes: List[int]) -> array:
+    if indexes == list(range(len(indexes))):
+        return values
+    return array('I', map(indexes.__getitem__, values))
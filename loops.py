@@ -0,0 +1,85 @@
+from dataclasses import dataclass
+from typing import List, Optional, Set
+from syntax_tree import Node, Literal, Name, BinaryOp, Declare, Assign, If, While, For
+
+ints = frozenset([int])
+
+# a for loop that counts an int variable from start up to bound (or down to it) by a fixed step,
+# which the engines can run with python's range instead of running its condition and update
+@dataclass
+class CountedLoop:
+    slot: int
+    start: Node
+    bound: Node
+    step: int # negative when counting down
+    inclusive: bool # <= or >= rather than < or >
+
+    # the stop argument for range
+    def stop(self, bound: int) -> int:
+        if not self.inclusive:
+            return bound
+        return bound + 1 if self.step > 0 else bound - 1
+
+# matches "for (var i = start; i < bound; i = i + step)" and the ones with <=, and the ones counting
+# down with > or >= and i = i - step, where step is a positive int literal. nothing in the body can
+# assign to i or to the variables in bound, so bound comes out the same every time, and inference.py
+# has to have worked out that start and bound are ints (so a program that isn't optimized never
+# has counted loops). returns None for any other loop
+def counted_loop(node: For) -> Optional[CountedLoop]:
+    init, condition, update = node.init, node.condition, node.update
+    if type(init) is not Declare or type(update) is not Assign or update.slot != init.slot:
+        return None
+    slot = init.slot
+    if type(condition) is not BinaryOp or condition.operator not in ['<', '<=', '>', '>=']:
+        return None
+    if not is_name(condition.left, slot) or init.value.types != ints or condition.right.types != ints:
+        return None
+    step = update_step(update.value, slot)
+    if step is None or (step > 0) != (condition.operator in ['<', '<=']):
+        return None
+    assigned = assigned_slots(node.body)
+    if slot in assigned or read_slots(condition.right) & (assigned | {slot}):
+        return None
+    return CountedLoop(slot, init.value, condition.right, step, condition.operator in ['<=', '>='])
+
+def is_name(expression: Node, slot: int) -> bool:
+    return type(expression) is Name and expression.slot == slot
+
+# step for "i + step", "step + i" or "i - step", None for anything else
+def update_step(expression: Node, slot: int) -> Optional[int]:
+    if type(expression) is not BinaryOp or expression.operator not in ['+', '-']:
+        return None
+    left, right = expression.left, expression.right
+    if expression.operator == '+' and is_name(right, slot):
+        left, right = right, left
+    if not is_name(left, slot) or type(right) is not Literal or type(right.value) is not int or right.value <= 0:
+        return None
+    return right.value if expression.operator == '+' else -right.value
+
+def assigned_slots(statements: List[Node]) -> Set[int]:
+    slots = set()
+    for statement in statements:
+        match statement:
+            case Declare() | Assign():
+                slots.add(statement.slot)
+            case If():
+                for branch in statement.branches:
+                    slots |= assigned_slots(branch.body)
+                if statement.orelse is not None:
+                    slots |= assigned_slots(statement.orelse)
+            case While():
+                slots |= assigned_slots(statement.body)
+            case For():
+                slots |= assigned_slots([statement.init, statement.update] + statement.body)
+    return slots
+
+def read_slots(expression: Node) -> Set[int]:
+    match expression:
+        case Name():
+            return {expression.slot}
+        case BinaryOp():
+            return read_slots(expression.left) | read_slots(expression.right)
+        case Literal():
+            return set()
+        case _:
+            return read_slots(expression.operand)
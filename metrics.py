@@ -0,0 +1,112 @@
+import json
+import time
+import contextlib
+from typing import Callable, ContextManager, Dict, TextIO
+from syntax_tree import Node, UnaryOp, BinaryOp, Declare, Assign, Print, If, While, For
+from evaluator import Evaluator
+from varmap import VarMap
+from output import Output
+
+statement_kinds = {Declare: 'parse_declare', Assign: 'parse_assign', Print: 'parse_print', If: 'parse_if', While: 'parse_while', For: 'parse_for'}
+
+metric_formats = ['json', 'prometheus']
+
+# what a run did and how long each phase of it took. the phases are lex, parse, cache (loading a
+# program from the cache instead of lexing and parsing it), compile (resolving, optimizing and
+# turning the tree into what the engine runs) and execute. the counters are only filled in by
+# MetricsEvaluator, so they stay at 0 on the other engines
+class Metrics(object):
+    def __init__(self):
+        self.statements: Dict[str, int] = dict.fromkeys(statement_kinds.values(), 0)
+        self.expressions = 0
+        self.operators: Dict[str, int] = {}
+        self.peak_scope_depth = 0
+        self.phases: Dict[str, float] = {}
+
+    # adds the time spent in the with block to the phase
+    @contextlib.contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - start
+
+    # call after resolving a program against varmap
+    def record_scopes(self, varmap: VarMap):
+        self.peak_scope_depth = max(self.peak_scope_depth, varmap.peak_depth)
+
+    def as_dict(self) -> Dict:
+        return {
+            'statements': dict(self.statements),
+            'expressions': self.expressions,
+            'operators': dict(sorted(self.operators.items())),
+            'peak_scope_depth': self.peak_scope_depth,
+            'phase_seconds': dict(self.phases),
+        }
+
+    def write_json(self, file: TextIO):
+        json.dump(self.as_dict(), file, indent=2)
+        file.write('\n')
+
+    # the text format prometheus scrapes, or node_exporter's textfile collector picks up
+    def write_prometheus(self, file: TextIO):
+        def metric(name: str, kind: str, help: str, samples: Dict[str, int | float], label: str = None):
+            file.write(f'# HELP skibidi_{name} {help}\n# TYPE skibidi_{name} {kind}\n')
+            for key, value in samples.items():
+                labels = f'{{{label}="{key}"}}' if label is not None else ''
+                file.write(f'skibidi_{name}{labels} {value}\n')
+        metric('statements_total', 'counter', 'Statements executed, by kind.', self.statements, 'kind')
+        metric('expressions_total', 'counter', 'Expressions evaluated, counting every operand.', {None: self.expressions})
+        metric('operators_total', 'counter', 'Operators applied, by symbol.', dict(sorted(self.operators.items())), 'operator')
+        metric('peak_scope_depth', 'gauge', 'Most scopes open at once.', {None: self.peak_scope_depth})
+        # only ever added to, across every run the metrics cover, so it's a counter like the others
+        metric('phase_seconds_total', 'counter', 'Seconds spent in each phase.', self.phases, 'phase')
+
+    def write(self, file: TextIO, format: str = 'json'):
+        if format == 'prometheus':
+            self.write_prometheus(file)
+        else:
+            self.write_json(file)
+
+# metrics.phase(name), or nothing when metrics is None, so callers don't need two code paths
+def timed(metrics: Metrics | None, name: str) -> ContextManager:
+    return metrics.phase(name) if metrics is not None else contextlib.nullcontext()
+
+# an Evaluator that counts every statement, expression and operator it runs, the way ProfilingEvaluator
+# times them. the plain Evaluator is used when metrics are off, so that costs nothing.
+# loops run their condition and update like any other statement and expression, so they're counted too
+class MetricsEvaluator(Evaluator):
+    counted_loops = False
+
+    def __init__(self, varmap: VarMap = None, output: Output = None, metrics: Metrics = None):
+        super().__init__(varmap, output)
+        self.metrics = metrics if metrics is not None else Metrics()
+
+    def compile_statement(self, statement: Node) -> Callable:
+        execute = super().compile_statement(statement)
+        kind = statement_kinds.get(type(statement))
+        if kind is None:
+            return execute
+        statements = self.metrics.statements
+        def counted():
+            statements[kind] += 1
+            execute()
+        return counted
+
+    def compile_expression(self, expression: Node) -> Callable:
+        evaluate = super().compile_expression(expression)
+        metrics = self.metrics
+        if not isinstance(expression, (UnaryOp, BinaryOp)):
+            def counted():
+                metrics.expressions += 1
+                return evaluate()
+            return counted
+        operators = metrics.operators
+        operator = expression.operator
+        operators.setdefault(operator, 0)
+        def counted_operator():
+            metrics.expressions += 1
+            operators[operator] += 1
+            return evaluate()
+        return counted_operator
@@ -0,0 +1,99 @@
+# the original character by character lexer from skibidi_interpreter.py, kept so the new one can be
+# benchmarked and checked against it (see benchmarks/bench_lexer.py)
+from typing import List, Tuple
+from lexical import Lexeme, Token
+
+keywords = ['true', 'false', 'if', 'elif', 'else', 'while', 'for', 'var', 'and', 'or', 'end', 'print']
+symbols = ['+', '-', '*', '/', '%', '!', '=', '<', '>', '==', '!=', '<=', '>=']
+punctuators = ['(', ')', '\"', '\'', ';']
+
+
+def get_lexeme(code: str, start: int, line: int) -> Tuple[Lexeme, int]:
+    if code[start].isalpha():
+        end = start + 1
+        for i in range(end, len(code)):
+            char = code[i]
+            if not (char.isalpha() or char.isnumeric() or char == '_'):
+                end = i
+                break
+        else:
+            # if the for loop terminates normally, we're at the end of the code
+            end = len(code)
+        lex = check_keyword(code[start:end])
+        lex.line = line
+        return lex, end
+    elif code[start].isnumeric() or ((code[start] == '+' or code[start] == '-') and code[start+1].isnumeric()):
+        end = start + 1
+        for i in range(end, len(code)):
+            char = code[i]
+            if not char.isnumeric() and char != '.':
+                end = i
+                break
+        else:
+            end = len(code)
+        try:
+            value = float(code[start:end])
+        except ValueError:
+            raise SyntaxError(f'Line {line}: invalid syntax for number') from None
+        # "from None" hides the message "During handling of the above exception, another exception occurred"
+        # probably a bad way to do it but i don't have time to look into it
+        if value.is_integer():
+            value = int(value)
+        lex = Lexeme(value, Token.LITERAL, line)
+        return lex, end
+    elif code[start] == '\n':
+        return Lexeme('\n', Token.NEWLINE, line), start + 1
+    elif code[start] in symbols:
+        end = start + 1
+        if code[start:start+2] in ['==', '<=', '>=', '!=']:
+            end = start + 2
+        return Lexeme(code[start:end], Token.OPERATOR, line), end
+    elif code[start] in punctuators and code[start] in ['\"', '\'']:
+        open_char = code[start]
+        end = start + 1
+        found_close = False
+        for i in range(end, len(code)):
+            if code[i] == open_char:
+                end = i
+                found_close = True
+                break
+            elif code[i] == '\n':
+                end = i
+        if not found_close:
+            raise SyntaxError(f'Line {line}: unclosed string literal')
+        return Lexeme(code[start+1:end], Token.LITERAL, line), end + 1
+    elif code[start] in punctuators:
+        return Lexeme(code[start], Token.PUNCTUATOR, line), start + 1
+    else:
+        raise SyntaxError(f'Line {line}: invalid syntax')
+
+def check_keyword(lex: str) -> Lexeme:
+    if lex not in keywords:
+        return Lexeme(lex, Token.IDENTIFIER)
+    match lex:
+        case 'true':
+            return Lexeme(True, Token.LITERAL)
+        case 'false':
+            return Lexeme(False, Token.LITERAL)
+        case 'and' | 'or':
+            return Lexeme(lex, Token.OPERATOR)
+        case _:
+            return Lexeme(lex, Token.KEYWORD)
+
+def code_to_lexemes(code: str) -> List[Lexeme]:
+    lexemes = []
+
+    i = 0
+    line = 1
+    while i < len(code):
+        if code[i] == ' ':
+            i += 1
+            continue
+        lex, i = get_lexeme(code, i, line) 
+        if lex.token is Token.NEWLINE:
+            line += 1
+        lexemes.append(lex)
+
+    # [print(f'{i}: {lexeme}') for i, lexeme in enumerate(lexemes)]
+
+    return lexemes
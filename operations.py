@@ -0,0 +1,78 @@
+import operator
+from typing import Callable, Dict
+from rope import Rope, concatenate
+
+operations = {
+    '+': operator.add,
+    '-': operator.sub,
+    '*': operator.mul,
+    '/': operator.truediv,
+    '%': operator.mod,
+    '==': operator.eq,
+    '<': operator.lt,
+    '>': operator.gt,
+    '<=': operator.le,
+    '>=': operator.ge,
+    '!=': operator.ne,
+    'and': lambda t1, t2: t1 and t2,
+    'or': lambda t1, t2: t1 or t2
+}
+
+# comparisons always give back a bool, so they never need the float to int check
+comparisons = ['==', '<', '>', '<=', '>=', '!=']
+
+# a rope is a string that hasn't been put together yet (see rope.py)
+strings = (str, Rope)
+
+# wraps an operation with the language's rules: if either side is a string both sides become
+# strings, and a float that comes out as a whole number becomes an int
+def make_operation(symbol: str) -> Callable:
+    operation = operations[symbol]
+    if symbol in comparisons:
+        def apply(term1, term2):
+            if type(term1) in strings or type(term2) in strings:
+                return operation(str(term1), str(term2))
+            return operation(term1, term2)
+    else:
+        if symbol == '+':
+            operation_on_strings = concatenate
+        else:
+            operation_on_strings = lambda term1, term2: operation(str(term1), str(term2))
+        def apply(term1, term2):
+            if type(term1) in strings or type(term2) in strings:
+                return operation_on_strings(term1, term2)
+            answer = operation(term1, term2)
+            if type(answer) is float and answer.is_integer():
+                return int(answer)
+            return answer
+    return apply
+
+binary_operations: Dict[str, Callable] = {symbol: make_operation(symbol) for symbol in operations}
+
+def operate(symbol: str, term1, term2):
+    return binary_operations[symbol](term1, term2)
+
+# the same operations for when inference.py has worked out that neither side can be a string,
+# so only the float to int check is left
+def make_number_operation(symbol: str) -> Callable:
+    operation = operations[symbol]
+    if symbol in comparisons:
+        return operation
+    def apply(term1, term2):
+        answer = operation(term1, term2)
+        if type(answer) is float and answer.is_integer():
+            return int(answer)
+        return answer
+    return apply
+
+number_operations: Dict[str, Callable] = {symbol: make_number_operation(symbol) for symbol in operations}
+
+# the fastest operation that gives the same answer as binary_operations[symbol] for operands of
+# the given types (None when they're unknown): without strings the string check can go, and
+# without floats (or "/", which makes them out of ints) so can the float check
+def specialize(symbol: str, left_types: frozenset | None, right_types: frozenset | None) -> Callable:
+    if left_types is None or right_types is None or str in left_types or str in right_types:
+        return binary_operations[symbol]
+    if symbol in comparisons or (float not in left_types and float not in right_types and symbol != '/'):
+        return operations[symbol]
+    return number_operations[symbol]
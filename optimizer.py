@@ -0,0 +1,96 @@
+from typing import List
+from syntax_tree import Node, Literal, UnaryOp, BinaryOp, Declare, Assign, Print, If, While, For, Program
+from operations import operate
+from rope import Rope
+from inference import infer
+from varmap import VarMap
+
+# optimization levels for optimize(). 0 runs the tree as parsed, 1 folds constants, drops dead code
+# and works out the types of expressions so the engines can use faster operations (see inference.py)
+levels = [0, 1]
+
+# runs between resolving and running a program. it works on the resolved tree, so dropping a block
+# or splicing its statements into the enclosing block can't change which variable a name refers to,
+# and the resolver has already reported any errors in code that gets dropped here.
+# varmap is the one the program was resolved against
+def optimize(program: Program, level: int = 1, varmap: VarMap = None) -> Program:
+    if level >= 1:
+        program.body = optimize_block(program.body)
+        infer(program, varmap)
+    return program
+
+def optimize_block(statements: List[Node]) -> List[Node]:
+    optimized = []
+    for statement in statements:
+        optimized += optimize_statement(statement)
+    return optimized
+
+# returns the statements to replace statement with
+def optimize_statement(statement: Node) -> List[Node]:
+    match statement:
+        case Declare() | Assign() | Print():
+            fold_values(statement)
+        case If():
+            return optimize_if(statement)
+        case While():
+            statement.condition = fold(statement.condition)
+            if is_constant(statement.condition) and statement.condition.value is not True:
+                return [] # loops only run while their condition is True
+            statement.body = optimize_block(statement.body)
+        case For():
+            fold_values(statement.init)
+            statement.condition = fold(statement.condition)
+            if is_constant(statement.condition) and statement.condition.value is not True:
+                return [statement.init]
+            statement.body = optimize_block(statement.body)
+            fold_values(statement.update)
+    return [statement]
+
+def fold_values(statement: Node):
+    if type(statement) in [Declare, Assign, Print] and statement.value is not None:
+        statement.value = fold(statement.value)
+
+def optimize_if(node: If) -> List[Node]:
+    branches = []
+    for branch in node.branches:
+        branch.condition = fold(branch.condition)
+        if is_constant(branch.condition) and branch.condition.value is True:
+            if not branches:
+                return optimize_block(branch.body)
+            # it's reached whenever the branches before it aren't taken, so it's the new else
+            node.branches = branches
+            node.orelse = optimize_block(branch.body)
+            return [node]
+        elif is_constant(branch.condition) and branch.condition.value is False:
+            continue
+        # a constant that isn't a bool still has to raise its TypeError when it's reached
+        branch.body = optimize_block(branch.body)
+        branches.append(branch)
+    node.branches = branches
+    if node.orelse is not None:
+        node.orelse = optimize_block(node.orelse)
+    if not branches:
+        return node.orelse or []
+    return [node]
+
+def is_constant(expression: Node) -> bool:
+    return type(expression) is Literal
+
+# evaluates the parts of expression that only involve literals, using the same operations the
+# program would run with. anything that would raise (like 1 / 0) is left alone so it raises at runtime
+def fold(expression: Node) -> Node:
+    match expression:
+        case UnaryOp():
+            expression.operand = fold(expression.operand)
+            if is_constant(expression.operand):
+                return Literal(not expression.operand.value, line=expression.line)
+        case BinaryOp():
+            expression.left = fold(expression.left)
+            expression.right = fold(expression.right)
+            if is_constant(expression.left) and is_constant(expression.right):
+                try:
+                    value = operate(expression.operator, expression.left.value, expression.right.value)
+                except Exception:
+                    return expression
+                return Literal(str(value) if type(value) is Rope else value, line=expression.line)
+    return expression
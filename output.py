@@ -0,0 +1,53 @@
+import sys
+from typing import List, TextIO
+
+default_buffer_size = 65536
+
+# where print() statements write to. text is kept in a list until there's at least buffer_size
+# characters of it and then written with one call, instead of python's print() writing every line
+# (and its newline) separately. the engines flush when a program ends, whether it finished or failed,
+# so nothing is lost and everything comes out in the same order as with print()
+class Output(object):
+    def __init__(self, file: TextIO = None, buffer_size: int = default_buffer_size):
+        self.file = file if file is not None else sys.stdout
+        self.buffer_size = buffer_size
+        self.parts: List[str] = []
+        self.size = 0
+
+    def write(self, text: str):
+        self.parts.append(text)
+        self.size += len(text)
+        if self.size >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        if self.parts:
+            self.file.write(''.join(self.parts))
+            self.parts.clear()
+            self.size = 0
+        self.file.flush()
+
+    def close(self):
+        self.flush()
+
+class FileOutput(Output):
+    def __init__(self, path: str, buffer_size: int = default_buffer_size):
+        super().__init__(open(path, 'w'), buffer_size)
+
+    def close(self):
+        super().close()
+        self.file.close()
+
+# keeps everything in memory, for running programs from python and looking at what they printed
+class CollectedOutput(Output):
+    def __init__(self):
+        self.parts: List[str] = []
+
+    def write(self, text: str):
+        self.parts.append(text)
+
+    def flush(self):
+        pass
+
+    def getvalue(self) -> str:
+        return ''.join(self.parts)
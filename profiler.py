@@ -0,0 +1,97 @@
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, TextIO, Tuple
+from syntax_tree import Node, Declare, Assign, Print, Branch, If, While, For
+from evaluator import Evaluator
+from varmap import VarMap
+from output import Output
+
+statement_kinds = {Declare: 'var', Assign: 'assign', Print: 'print', If: 'if', While: 'while', For: 'for'}
+
+@dataclass(slots=True)
+class LineStats:
+    hits: int = 0
+    total_time: float = 0.0
+    self_time: float = 0.0 # total_time minus the time spent in statements nested in this line's
+    evaluations: int = 0 # expressions evaluated, counting every operand
+
+# an Evaluator that wraps every closure it compiles with one that records where the time goes.
+# the plain Evaluator is used when profiling is off, so that costs nothing.
+# a for loop's init and update are on the same line as the loop, so time spent in a statement nested
+# in one on the same line only counts once towards the line's total. loops run their condition and
+# update on every iteration like the plain evaluator used to, so those show up in the report too
+class ProfilingEvaluator(Evaluator):
+    counted_loops = False
+
+    def __init__(self, varmap: VarMap = None, output: Output = None):
+        super().__init__(varmap, output)
+        self.lines: Dict[int, LineStats] = {}
+        self.stacks: Dict[Tuple[str, ...], float] = {} # self time by the blocks the statement ran in
+        self.frames: List[list] = [] # [frame name, line, time spent in nested statements]
+
+    def stats(self, line: int) -> LineStats:
+        if line not in self.lines:
+            self.lines[line] = LineStats()
+        return self.lines[line]
+
+    def compile_statement(self, statement: Node) -> Callable:
+        execute = super().compile_statement(statement)
+        return self.profile(execute, f'{statement_kinds.get(type(statement), "statement")} (line {statement.line})', statement.line)
+
+    # an elif is on a line of its own, so checking its condition counts as a hit on that line, timed
+    # apart from the if statement it belongs to (the first branch is the if statement's own line)
+    def compile_branch_condition(self, node: If, branch: Branch) -> Callable:
+        condition = super().compile_branch_condition(node, branch)
+        if branch is node.branches[0]:
+            return condition
+        return self.profile(condition, f'elif (line {branch.line})', branch.line)
+
+    # wraps call so every call to it is timed as a frame called name on line
+    def profile(self, call: Callable, name: str, line: int) -> Callable:
+        stats = self.stats(line)
+        frames = self.frames
+        stacks = self.stacks
+        clock = time.perf_counter
+        def profiled():
+            frame = [name, line, 0.0]
+            frames.append(frame)
+            start = clock()
+            try:
+                return call()
+            finally:
+                elapsed = clock() - start
+                frames.pop()
+                own = elapsed - frame[2]
+                stats.hits += 1
+                stats.self_time += own
+                if frames:
+                    frames[-1][2] += elapsed
+                if not frames or frames[-1][1] != line:
+                    stats.total_time += elapsed
+                stack = tuple(parent[0] for parent in frames) + (name,)
+                stacks[stack] = stacks.get(stack, 0.0) + own
+        return profiled
+
+    def compile_expression(self, expression: Node) -> Callable:
+        evaluate = super().compile_expression(expression)
+        stats = self.stats(expression.line)
+        def profiled():
+            stats.evaluations += 1
+            return evaluate()
+        return profiled
+
+    # slowest lines first. source_lines adds the code on each line to the table
+    def report(self, file: TextIO, source_lines: List[str] = None, limit: int = None):
+        rows = sorted(self.lines.items(), key=lambda item: item[1].self_time, reverse=True)
+        total = sum(stats.self_time for stats in self.lines.values())
+        file.write(f'{"line":>6} {"hits":>10} {"total ms":>11} {"self ms":>11} {"self %":>7} {"evals":>11}  code\n')
+        for line, stats in rows[:limit]:
+            code = source_lines[line - 1].strip() if source_lines and 0 < line <= len(source_lines) else ''
+            percent = stats.self_time / total * 100 if total else 0
+            file.write(f'{line:>6} {stats.hits:>10} {stats.total_time * 1000:>11.3f} {stats.self_time * 1000:>11.3f} {percent:>6.1f}% {stats.evaluations:>11}  {code}\n')
+
+    # one "outer;inner;statement microseconds" line per stack, the collapsed format flamegraph.pl
+    # and speedscope read
+    def write_collapsed(self, file: TextIO):
+        for stack, seconds in self.stacks.items():
+            file.write(f'{";".join(stack)} {round(seconds * 1_000_000)}\n')
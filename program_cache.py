@@ -0,0 +1,109 @@
+import os
+import gc
+import sys
+import pickle
+import hashlib
+import tempfile
+from typing import List, Optional
+from syntax_tree import Program
+
+# the files whose code decides what a parsed program looks like. they're hashed into the cache key,
+# so changing the lexer, the parser or the tree's nodes makes every old entry miss
+pipeline_files = ['lexical.py', 'syntax_tree.py', 'skibidi_interpreter.py']
+
+default_directory = os.path.join(os.path.expanduser('~'), '.cache', 'skibidi')
+default_max_size = 64 * 1024 * 1024
+
+def interpreter_version() -> str:
+    digest = hashlib.sha256(f'python {sys.version_info[0]}.{sys.version_info[1]}'.encode())
+    directory = os.path.dirname(os.path.abspath(__file__))
+    for name in pipeline_files:
+        with open(os.path.join(directory, name), 'rb') as file:
+            digest.update(file.read())
+    return digest.hexdigest()
+
+# keeps the parsed tree of every program it has seen on disk, like python's __pycache__, so running
+# the same source again skips lexing and parsing. entries are named after the hash of the source and
+# the interpreter version. they're written to a temporary file and renamed into place, so several
+# processes can share a cache without ever reading half an entry. once the cache is over max_size
+# the least recently used entries are deleted
+class ProgramCache(object):
+    def __init__(self, directory: str = None, max_size: int = default_max_size):
+        self.directory = directory or os.environ.get('SKIBIDI_CACHE_DIR') or default_directory
+        self.max_size = max_size
+        self.version = interpreter_version()
+
+    # source can also be the utf-8 bytes of it (or an mmap of them), which hash the same as the str
+    def key(self, source: str | bytes) -> str:
+        digest = hashlib.sha256(self.version.encode())
+        digest.update(source.encode() if isinstance(source, str) else source)
+        return digest.hexdigest()
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.directory, key + '.skbc')
+
+    def load(self, source: str | bytes) -> Optional[Program]:
+        key = self.key(source)
+        path = self.path(key)
+        # unpickling makes a lot of objects and none of them are garbage, so the cycle collector
+        # running over and over in the middle of it is wasted time (most of the load time for big trees)
+        collecting = gc.isenabled()
+        gc.disable()
+        try:
+            with open(path, 'rb') as file:
+                stored_key, program = pickle.load(file)
+            os.utime(path) # counts as a use for eviction
+        except Exception:
+            # missing, unreadable or from an incompatible version: all the same as a miss
+            return None
+        finally:
+            if collecting:
+                gc.enable()
+        return program if stored_key == key else None
+
+    def store(self, source: str | bytes, program: Program):
+        key = self.key(source)
+        temporary_path = None
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with tempfile.NamedTemporaryFile('wb', dir=self.directory, suffix='.tmp', delete=False) as file:
+                temporary_path = file.name
+                pickle.dump((key, program), file, pickle.HIGHEST_PROTOCOL)
+            os.replace(temporary_path, self.path(key))
+        except (OSError, pickle.PicklingError, RecursionError):
+            # the cache is only an optimization, so a program that can't be stored still runs
+            if temporary_path is not None and os.path.exists(temporary_path):
+                os.remove(temporary_path)
+            return
+        self.evict()
+
+    def entries(self, suffixes: tuple = ('.skbc',)) -> List[os.DirEntry]:
+        try:
+            return [entry for entry in os.scandir(self.directory) if entry.name.endswith(suffixes)]
+        except OSError:
+            return []
+
+    def evict(self):
+        sizes = {}
+        for entry in self.entries():
+            try:
+                sizes[entry.path] = entry.stat()
+            except OSError:
+                pass # another process deleted it
+        total = sum(stat.st_size for stat in sizes.values())
+        for path in sorted(sizes, key=lambda path: sizes[path].st_mtime):
+            if total <= self.max_size:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= sizes[path].st_size
+
+    # also removes temporary files left behind by processes that died while writing
+    def clear(self):
+        for entry in self.entries(('.skbc', '.tmp')):
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
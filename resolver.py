@@ -0,0 +1,73 @@
+from typing import List
+from syntax_tree import Node, Name, UnaryOp, BinaryOp, Declare, Assign, Print, If, While, For, Program
+from varmap import VarMap
+
+# gives every variable its slot before the program runs, using the same scoping rules the program
+# runs with: if, elif, else and loop bodies each get their own scope, and the variable declared by
+# a for loop lives in a scope around the whole loop. since this happens before running, undefined
+# and redeclared names are reported before any statement runs
+class Resolver(object):
+    def __init__(self, varmap: VarMap):
+        self.varmap = varmap
+
+    def resolve_block(self, statements: List[Node]):
+        for statement in statements:
+            self.resolve_statement(statement)
+
+    def resolve_scoped(self, statements: List[Node]):
+        self.varmap.open_scope()
+        self.resolve_block(statements)
+        self.varmap.close_scope()
+
+    def resolve_statement(self, statement: Node):
+        match statement:
+            case Declare():
+                if statement.name in self.varmap:
+                    raise NameError(f'Line {statement.line}: identifier "{statement.name}" already taken')
+                self.resolve_expression(statement.value)
+                statement.slot = self.varmap.declare(statement.name)
+            case Assign():
+                if statement.name not in self.varmap:
+                    raise SyntaxError(f'Line {statement.line}: identifier "{statement.name}" not defined')
+                statement.slot = self.varmap.slot(statement.name)
+                self.resolve_expression(statement.value)
+            case Print() if statement.value is not None:
+                self.resolve_expression(statement.value)
+            case If():
+                for branch in statement.branches:
+                    self.resolve_expression(branch.condition)
+                    self.resolve_scoped(branch.body)
+                if statement.orelse is not None:
+                    self.resolve_scoped(statement.orelse)
+            case While():
+                self.resolve_expression(statement.condition)
+                self.resolve_scoped(statement.body)
+            case For():
+                self.varmap.open_scope()
+                self.resolve_statement(statement.init)
+                self.resolve_expression(statement.condition)
+                self.resolve_scoped(statement.body)
+                # the update runs every iteration, so a declaration there could only ever work once.
+                # it was never parsed as one before the tree existed, which reported it like this
+                if type(statement.update) is Declare:
+                    raise SyntaxError(f'Line {statement.update.line}: invalid expression')
+                self.resolve_statement(statement.update)
+                self.varmap.close_scope()
+
+    def resolve_expression(self, expression: Node):
+        match expression:
+            case Name():
+                if expression.name not in self.varmap:
+                    raise NameError(f'Line {expression.line}: identifier "{expression.name}" not defined')
+                expression.slot = self.varmap.slot(expression.name)
+            case UnaryOp():
+                self.resolve_expression(expression.operand)
+            case BinaryOp():
+                self.resolve_expression(expression.left)
+                self.resolve_expression(expression.right)
+
+# fills in the slots of program's variables. top level declarations stay declared in varmap,
+# and varmap.values grows to fit every slot the program uses
+def resolve(program: Program, varmap: VarMap) -> Program:
+    Resolver(varmap).resolve_block(program.body)
+    return program
@@ -0,0 +1,54 @@
+import io
+
+# strings shorter than this are concatenated as usual
+rope_threshold = 1024
+
+# a string that's being built by appending to it, as in "s = s + i" in a loop. python copies both
+# sides into a new string on every +, so building a long string that way takes quadratic time.
+# a rope writes what's appended to a buffer instead and only turns into a str when something looks
+# at it (printing it, comparing it, any other operation). the buffer is only ever appended to, and
+# a rope is the first length characters in it, so two ropes can share one: appending to a rope that
+# isn't the end of its buffer any more copies it into a new buffer instead
+class Rope(object):
+    __slots__ = ('buffer', 'length', 'text')
+
+    def __init__(self, buffer: io.StringIO, length: int):
+        self.buffer = buffer
+        self.length = length
+        self.text = None
+
+    @staticmethod
+    def start(text: str) -> 'Rope':
+        buffer = io.StringIO()
+        buffer.write(text)
+        return Rope(buffer, len(text))
+
+    def append(self, text: str) -> 'Rope':
+        buffer = self.buffer
+        if buffer.tell() != self.length:
+            return Rope.start(str(self) + text)
+        buffer.write(text)
+        return Rope(buffer, self.length + len(text))
+
+    def __str__(self) -> str:
+        if self.text is None:
+            self.text = self.buffer.getvalue()[:self.length]
+        return self.text
+
+    def __format__(self, format_spec: str) -> str:
+        return format(str(self), format_spec)
+
+    def __bool__(self) -> bool:
+        return self.length > 0
+
+    def __repr__(self) -> str:
+        return repr(str(self))
+
+# "+" when either side is a string
+def concatenate(term1, term2) -> str | Rope:
+    if type(term1) is Rope:
+        return term1.append(str(term2))
+    text = str(term1) + str(term2)
+    if len(text) < rope_threshold:
+        return text
+    return Rope.start(text)
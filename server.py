@@ -0,0 +1,273 @@
+# keeps an interpreter running between programs, so running a short one costs microseconds instead
+# of starting python. an interactive repl, or a server that takes one JSON request per line on stdin
+# or a unix socket and answers each with one JSON line:
+#   {"id": 1, "source": "var a = 1\nprint(a)\n"}
+#   {"id": 1, "ok": true, "output": "1\n", "error": null, "cached": false, "compile_us": 412.3, "run_us": 18.9}
+# "id" is optional and sent back as is. {"reset": true} forgets the session's variables.
+# "max_steps" and "max_time" limit the run like Interpreter.run does, but only to less than the
+# server's own --max-steps and --max-time
+# usage: python skibidi_interpreter.py --repl | --serve - | --serve PATH [--shared-session] [--max-steps N] [--max-time SECONDS]
+import os
+import sys
+import json
+import stat
+import time
+import threading
+import socketserver
+from collections import OrderedDict
+from typing import Callable, Dict, TextIO, Tuple
+
+from skibidi_interpreter import code_to_lexemes, unclosed_string
+from lexical import Token
+from interpreter import Interpreter, Limits, LimitedEvaluator
+from evaluator import Evaluator
+from bytecode import compile_program
+from vm import VirtualMachine
+from transpiler import transpile, PythonRunner, load as load_python
+from output import CollectedOutput
+from batch import describe
+
+default_cache_size = 256
+
+# variables that carry over from one program to the next, and the programs it has compiled.
+# a compiled program is only reused while the session's variables are the same ones, holding the same
+# types, as when it was compiled: the slots it uses and the operations type inference picked for it
+# depend on them. top level variables are never dropped, so how many there are tells which ones they are.
+# max_steps and max_time limit every program the session runs
+class Session(object):
+    def __init__(self, engine: str = 'tree', opt_level: int = 1, cache_size: int = default_cache_size, max_steps: int = None, max_time: float = None):
+        self.engine = engine
+        self.opt_level = opt_level
+        self.cache_size = cache_size
+        self.max_steps = max_steps
+        self.max_time = max_time
+        self.lock = threading.Lock() # a shared session gets requests from more than one connection
+        self.reset()
+
+    def reset(self):
+        self.output = CollectedOutput()
+        self.interpreter = Interpreter(self.output, self.engine, self.opt_level)
+        self.compiled: OrderedDict[Tuple, Tuple[Callable, Tuple[list, int]]] = OrderedDict()
+
+    # a limited program is compiled differently on the tree engine, so it's cached apart from the other
+    def key(self, source: str, limited: bool) -> Tuple:
+        varmap = self.interpreter.varmap
+        return source, limited, varmap.next_slot, tuple(type(value) for value in varmap.values[:varmap.next_slot])
+
+    # the scopes a program left behind are kept with it, for the (rare) hit on a program that declares
+    # variables of its own: declaring only happens when compiling
+    def prepare(self, source: str, limited: bool = False) -> Tuple[Callable, bool]:
+        varmap = self.interpreter.varmap
+        key = self.key(source, limited)
+        entry = self.compiled.get(key)
+        if entry is not None:
+            self.compiled.move_to_end(key)
+            execute, scopes = entry
+            varmap.restore(scopes)
+            return execute, True
+        execute = self.compile(source, limited)
+        self.compiled[key] = (execute, varmap.save())
+        if len(self.compiled) > self.cache_size:
+            self.compiled.popitem(last=False)
+        return execute, False
+
+    # the program is called with the limits for that run, which start when it does. a limited one
+    # checks them the way Interpreter.execute does
+    def compile(self, source: str, limited: bool = False) -> Callable[[int | None, float | None], None]:
+        program = self.interpreter.compile(source)
+        varmap = self.interpreter.varmap
+        if self.engine == 'vm':
+            code = compile_program(program)
+            machine = VirtualMachine(varmap, self.output)
+            if not limited:
+                return lambda max_steps, max_time: machine.run(code)
+            def execute_limited(max_steps: int | None, max_time: float | None):
+                limits = Limits(max_steps, max_time)
+                pc = 0
+                try:
+                    while pc < len(code.instructions):
+                        pc = limits.run_slice(machine, code, pc, 256)
+                finally:
+                    self.output.flush()
+            return execute_limited
+        if self.engine == 'python':
+            code = transpile(program, varmap)
+            try:
+                function = load_python(code)
+                runner = PythonRunner(varmap, self.output)
+                return lambda max_steps, max_time: runner.run(code, function)
+            except (SyntaxError, RecursionError, MemoryError):
+                pass # too deeply nested for python's compiler, see run_program
+        if not limited:
+            execute = Evaluator(varmap, self.output).compile(program)
+            return lambda max_steps, max_time: execute()
+        evaluator = LimitedEvaluator(varmap, self.output)
+        execute = evaluator.compile(program)
+        def execute_limited(max_steps: int | None, max_time: float | None):
+            evaluator.limits.reset(max_steps, max_time)
+            execute()
+        return execute_limited
+
+    # what the program printed comes back even when it fails part way. a program that fails is undone
+    # like in Interpreter.run, and isn't kept: the scopes kept with it are the ones it left half
+    # declared. max_steps and max_time can only make the session's own limits tighter
+    def run(self, source: str, max_steps: int = None, max_time: float = None) -> Dict:
+        max_steps = tighter(self.max_steps, max_steps)
+        max_time = tighter(self.max_time, max_time)
+        limited = max_steps is not None or max_time is not None
+        with self.lock:
+            response = {'ok': True, 'output': '', 'error': None, 'cached': False, 'compile_us': 0.0, 'run_us': 0.0}
+            start = time.perf_counter()
+            saved = self.interpreter.varmap.save()
+            key = self.key(source, limited)
+            try:
+                if limited and self.engine == 'python':
+                    raise ValueError('max_steps and max_time only work with the tree and vm engines')
+                execute, response['cached'] = self.prepare(source, limited)
+                compiled = time.perf_counter()
+                response['compile_us'] = (compiled - start) * 1_000_000
+                try:
+                    execute(max_steps, max_time)
+                finally:
+                    response['run_us'] = (time.perf_counter() - compiled) * 1_000_000
+            except Exception as error:
+                self.undo(saved, key)
+                response['ok'] = False
+                response['error'] = describe(error)
+            except BaseException:
+                self.undo(saved, key) # ctrl-c in the repl
+                raise
+            response['output'] = self.output.getvalue()
+            self.output.parts.clear()
+            return response
+
+    def undo(self, saved: Tuple[list, int], key: Tuple):
+        self.interpreter.varmap.restore(saved)
+        self.compiled.pop(key, None)
+
+    def handle(self, request: Dict) -> Dict:
+        if request.get('reset'):
+            with self.lock:
+                self.reset()
+            response = {'ok': True, 'output': '', 'error': None}
+        elif not isinstance(request.get('source'), str):
+            response = {'ok': False, 'output': '', 'error': 'the request needs a "source" string'}
+        elif not valid_limit(request.get('max_steps'), int) or not valid_limit(request.get('max_time'), (int, float)):
+            response = {'ok': False, 'output': '', 'error': '"max_steps" needs to be a whole number and "max_time" a number, neither below 0'}
+        else:
+            response = self.run(request['source'], request.get('max_steps'), request.get('max_time'))
+        if 'id' in request:
+            response = {'id': request['id'], **response}
+        return response
+
+# the smaller of two limits, where None is no limit
+def tighter(limit: int | float | None, other: int | float | None) -> int | float | None:
+    if limit is None:
+        return other
+    if other is None:
+        return limit
+    return min(limit, other)
+
+# a limit a request can leave out or set to a number that isn't negative. true and false are ints to python
+def valid_limit(value, kinds: type | Tuple[type, ...]) -> bool:
+    return value is None or (isinstance(value, kinds) and not isinstance(value, bool) and value >= 0)
+
+def handle_line(session: Session, line: str) -> Dict:
+    try:
+        request = json.loads(line)
+    except ValueError as error:
+        return {'ok': False, 'output': '', 'error': f'invalid request: {error}'}
+    if not isinstance(request, dict):
+        return {'ok': False, 'output': '', 'error': 'invalid request: expected a JSON object'}
+    return session.handle(request)
+
+# answers every line of requests on responses until requests ends
+def serve_lines(session: Session, requests: TextIO, responses: TextIO):
+    for line in requests:
+        if line.strip():
+            responses.write(json.dumps(handle_line(session, line)) + '\n')
+            responses.flush()
+
+class SessionHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        server = self.server
+        session = server.session or Session(server.engine, server.opt_level, server.cache_size, server.max_steps, server.max_time)
+        for line in self.rfile:
+            if line.strip():
+                self.wfile.write(json.dumps(handle_line(session, line.decode('utf-8'))).encode() + b'\n')
+
+# every connection gets a session of its own, unless shared is set and they all use the same one.
+# a socket already at path is taken to be one left behind by a server that didn't shut down and is
+# replaced, anything else there is left alone
+def serve_socket(path: str, engine: str = 'tree', opt_level: int = 1, cache_size: int = default_cache_size, shared: bool = False,
+                 max_steps: int = None, max_time: float = None):
+    try:
+        mode = os.lstat(path).st_mode
+    except FileNotFoundError:
+        pass
+    else:
+        if not stat.S_ISSOCK(mode):
+            raise FileExistsError(f'{path} already exists and is not a socket')
+        os.remove(path)
+    server = socketserver.ThreadingUnixStreamServer(path, SessionHandler)
+    server.daemon_threads = True
+    server.engine = engine
+    server.opt_level = opt_level
+    server.cache_size = cache_size
+    server.max_steps = max_steps
+    server.max_time = max_time
+    server.session = Session(engine, opt_level, cache_size, max_steps, max_time) if shared else None
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        os.remove(path)
+
+# whether source stops in the middle of a statement: inside a string, or with a block that hasn't been ended
+def incomplete(source: str) -> bool:
+    try:
+        lexemes = code_to_lexemes(source)
+    except SyntaxError as error:
+        return str(error).endswith(unclosed_string)
+    depth = 0
+    for lex in lexemes:
+        if lex.token is Token.KEYWORD and lex.lexeme in ['if', 'while', 'for']:
+            depth += 1
+        elif lex.token is Token.KEYWORD and lex.lexeme == 'end':
+            depth -= 1
+    return depth > 0
+
+def repl(session: Session):
+    try:
+        import readline # line editing and history, where it's available
+    except ImportError:
+        pass
+    print(f'skibidi ({session.engine} engine). blocks go on until "end", ctrl-d quits')
+    while True:
+        source = ''
+        prompt = '>>> '
+        try:
+            while True:
+                source += input(prompt) + '\n'
+                if not incomplete(source):
+                    break
+                prompt = '... '
+        except EOFError:
+            print()
+            return
+        except KeyboardInterrupt:
+            print()
+            continue
+        if not source.strip():
+            continue
+        try:
+            response = session.run(source)
+        except KeyboardInterrupt:
+            session.output.parts.clear()
+            print('interrupted', file=sys.stderr)
+            continue
+        sys.stdout.write(response['output'])
+        if not response['ok']:
+            print(response['error'], file=sys.stderr)
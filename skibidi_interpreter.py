@@ -1,14 +1,74 @@
+import gc
+import os
 import sys
-from typing import List, Tuple
-from lexical import Lexeme, Token
+import mmap
+import contextlib
+import re
+import argparse
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, List, TextIO, Tuple
+from lexical import Lexeme, Token, TokenStream, precedence, remap_values
+from syntax_tree import Node, Literal, Name, UnaryOp, BinaryOp, Declare, Assign, Print, Branch, If, While, For, Program
+from evaluator import Evaluator
+from bytecode import compile_program, disassemble
+from vm import VirtualMachine
+from resolver import resolve
 from varmap import VarMap
-
-sys.tracebacklimit = 0 # this is to hide python's traceback on errors
-
-keywords = ['true', 'false', 'if', 'elif', 'else', 'while', 'for', 'var', 'and', 'or', 'end', 'print']
-symbols = ['+', '-', '*', '/', '%', '!', '=', '<', '>', '==', '!=', '<=', '>=']
-punctuators = ['(', ')', '\"', '\'', ';']
-
+from program_cache import ProgramCache
+from optimizer import optimize, levels
+from profiler import ProfilingEvaluator
+from metrics import Metrics, MetricsEvaluator, metric_formats, timed
+from output import Output, FileOutput, default_buffer_size
+from transpiler import transpile, PythonRunner, load as load_python
+
+keywords = frozenset(['true', 'false', 'if', 'elif', 'else', 'while', 'for', 'var', 'and', 'or', 'end', 'print'])
+symbols = frozenset(['+', '-', '*', '/', '%', '!', '=', '<', '>', '==', '!=', '<=', '>='])
+punctuators = frozenset(['(', ')', '\"', '\'', ';'])
+
+# the value and token every keyword turns into
+keyword_lexemes: Dict[str, Tuple[str | bool, Token]] = {
+    keyword: (keyword, Token.KEYWORD) for keyword in keywords
+} | {
+    'true': (True, Token.LITERAL),
+    'false': (False, Token.LITERAL),
+    'and': ('and', Token.OPERATOR),
+    'or': ('or', Token.OPERATOR),
+}
+
+# one pattern for every kind of lexeme (and the spaces before it), so the lexer takes a whole lexeme
+# per regex match instead of looking at one character at a time. the order matters: a "+" or "-" right before a digit belongs
+# to the number. anything else (non-ascii letters and digits, unclosed strings, invalid characters)
+# is "other" and goes through get_lexeme, which knows how to lex or report it
+lexeme_pattern = re.compile(r'''
+    \ *(?:
+     (?P<word>[A-Za-z]\w*)
+    |(?P<newline>\n)
+    |(?P<number>[+-]?\d[\d.]*)
+    |(?P<operator>[=<>!]=|[-+*/%!=<>])
+    |(?P<punctuator>[();])
+    |(?P<string>"[^"]*"|'[^']*')
+    |(?P<other>[^ ])
+    )
+''', re.VERBOSE | re.DOTALL)
+
+# the same pattern for lexing bytes (see code_to_lexemes_bytes). \w and \d only match ascii here, so a
+# word or number that runs into a non-ascii byte (which the str pattern might carry on into) doesn't
+# match at all and its first character goes to other instead
+lexeme_pattern_bytes = re.compile(rb'''
+    \ *(?:
+     (?P<word>[A-Za-z]\w*+(?![\x80-\xff]))
+    |(?P<newline>\n)
+    |(?P<number>[+-]?\d[\d.]*+(?![\x80-\xff]))
+    |(?P<operator>[=<>!]=|[-+*/%!=<>])
+    |(?P<punctuator>[();])
+    |(?P<string>"[^"]*"|'[^']*')
+    |(?P<other>[^ ])
+    )
+''', re.VERBOSE | re.DOTALL)
+
+# the streaming lexer looks for this to tell a string that's cut off at the end of a chunk from other errors
+unclosed_string = 'unclosed string literal'
 
 def get_lexeme(code: str, start: int, line: int) -> Tuple[Lexeme, int]:
     if code[start].isalpha():
@@ -62,7 +122,9 @@ def get_lexeme(code: str, start: int, line: int) -> Tuple[Lexeme, int]:
             elif code[i] == '\n':
                 end = i
         if not found_close:
-            raise SyntaxError(f'Line {line}: unclosed string literal')
+            error = SyntaxError(f'Line {line}: {unclosed_string}')
+            error.offset = start # where the string starts in code, for iter_lexemes
+            raise error
         return Lexeme(code[start+1:end], Token.LITERAL, line), end + 1
     elif code[start] in punctuators:
         return Lexeme(code[start], Token.PUNCTUATOR, line), start + 1
@@ -70,353 +132,706 @@ def get_lexeme(code: str, start: int, line: int) -> Tuple[Lexeme, int]:
         raise SyntaxError(f'Line {line}: invalid syntax')
 
 def check_keyword(lex: str) -> Lexeme:
-    if lex not in keywords:
+    if lex not in keyword_lexemes:
         return Lexeme(lex, Token.IDENTIFIER)
-    match lex:
-        case 'true':
-            return Lexeme(True, Token.LITERAL)
-        case 'false':
-            return Lexeme(False, Token.LITERAL)
-        case 'and' | 'or':
-            return Lexeme(lex, Token.OPERATOR)
-        case _:
-            return Lexeme(lex, Token.KEYWORD)
-
-def code_to_lexemes(code: str) -> List[Lexeme]:
-    lexemes = []
-
-    i = 0
-    line = 1
-    while i < len(code):
-        if code[i] == ' ':
-            i += 1
-            continue
-        lex, i = get_lexeme(code, i, line) 
-        if lex.token is Token.NEWLINE:
-            line += 1
-        lexemes.append(lex)
+    value, token = keyword_lexemes[lex]
+    return Lexeme(value, token)
+
+# lexemes can be a TokenStream to keep them compact, otherwise they go in a new list.
+# line is the line number code starts on
+def code_to_lexemes(code: str, lexemes: List[Lexeme] | TokenStream = None, line: int = 1) -> List[Lexeme] | TokenStream:
+    if lexemes is None:
+        lexemes = []
+    append = lexemes.append
+    identifier = Token.IDENTIFIER
+    operator = Token.OPERATOR
+    literal = Token.LITERAL
+    punctuator = Token.PUNCTUATOR
+    newline = Token.NEWLINE
+
+    position = 0
+    while position < len(code):
+        for match in lexeme_pattern.finditer(code, position):
+            kind = match.lastgroup
+            if kind == 'word':
+                text = match.group(kind)
+                keyword = keyword_lexemes.get(text)
+                if keyword is None:
+                    # interned so every use of a name shares one string
+                    append(Lexeme(sys.intern(text), identifier, line))
+                else:
+                    append(Lexeme(keyword[0], keyword[1], line))
+            elif kind == 'operator':
+                append(Lexeme(match.group(kind), operator, line))
+            elif kind == 'punctuator':
+                append(Lexeme(match.group(kind), punctuator, line))
+            elif kind == 'newline':
+                append(Lexeme('\n', newline, line))
+                line += 1
+            elif kind == 'number':
+                try:
+                    value = float(match.group(kind))
+                except ValueError:
+                    raise SyntaxError(f'Line {line}: invalid syntax for number') from None
+                if value.is_integer():
+                    value = int(value)
+                append(Lexeme(value, literal, line))
+            elif kind == 'string':
+                append(Lexeme(match.group(kind)[1:-1], literal, line))
+            else:
+                # get_lexeme either lexes it or raises the right error. then carry on matching after it
+                lex, position = get_lexeme(code, match.start(kind), line)
+                append(lex)
+                break
+        else:
+            break
 
-    # [print(f'{i}: {lexeme}') for i, lexeme in enumerate(lexemes)]
+    return lexemes
+
+# lexes utf-8 source straight from bytes or an mmap, so a big file doesn't have to be decoded into a
+# str (and copied) first. only identifiers and strings are decoded, when their lexemes are made.
+# the bytes pattern is ascii only, so from wherever "other" matches the rest of that line is lexed as
+# a str by code_to_lexemes, which lexes it or raises the right error. a string can go over lines,
+# so if that leaves a string open the rest of the source is lexed as a str instead
+def code_to_lexemes_bytes(code: bytes, lexemes: List[Lexeme] | TokenStream = None, line: int = 1) -> List[Lexeme] | TokenStream:
+    if lexemes is None:
+        lexemes = []
+    append = lexemes.append
+    identifier = Token.IDENTIFIER
+    operator = Token.OPERATOR
+    literal = Token.LITERAL
+    punctuator = Token.PUNCTUATOR
+    newline = Token.NEWLINE
+
+    position = 0
+    while position < len(code):
+        for match in lexeme_pattern_bytes.finditer(code, position):
+            kind = match.lastgroup
+            if kind == 'word':
+                text = match.group(kind).decode('ascii')
+                keyword = keyword_lexemes.get(text)
+                if keyword is None:
+                    append(Lexeme(sys.intern(text), identifier, line))
+                else:
+                    append(Lexeme(keyword[0], keyword[1], line))
+            elif kind == 'operator':
+                append(Lexeme(match.group(kind).decode('ascii'), operator, line))
+            elif kind == 'punctuator':
+                append(Lexeme(match.group(kind).decode('ascii'), punctuator, line))
+            elif kind == 'newline':
+                append(Lexeme('\n', newline, line))
+                line += 1
+            elif kind == 'number':
+                try:
+                    value = float(match.group(kind))
+                except ValueError:
+                    raise SyntaxError(f'Line {line}: invalid syntax for number') from None
+                if value.is_integer():
+                    value = int(value)
+                append(Lexeme(value, literal, line))
+            elif kind == 'string':
+                append(Lexeme(match.group(kind)[1:-1].decode('utf-8'), literal, line))
+            else:
+                start = match.start(kind)
+                end = code.find(b'\n', start) + 1 or len(code)
+                # lexed on its own first, since a string that goes on past the line has the rest of the
+                # code lexed again from start, which mustn't find this line's lexemes already there
+                try:
+                    rest_of_line = code_to_lexemes(bytes(code[start:end]).decode('utf-8'), [], line)
+                except SyntaxError as error:
+                    if not str(error).endswith(unclosed_string):
+                        raise
+                    return code_to_lexemes(bytes(code[start:]).decode('utf-8'), lexemes, line)
+                for lex in rest_of_line:
+                    append(lex)
+                line += 1
+                position = end
+                break
+        else:
+            break
 
     return lexemes
 
-def parse_program(lexemes: List[Lexeme]):
-    i = 0
-    varmap = VarMap()
-    while i < len(lexemes):
-        i = parse_statement(lexemes, i, varmap)
-    
-    # print(varmap)
+# lexes file a chunk at a time and yields the lexemes of each chunk, so a big or piped program never
+# has to be read in whole. only complete lines are lexed, since that's the only place lexemes are
+# split except for strings, and a string that's still open at the end of a chunk waits for the next one.
+# everything before that string is lexed once: the buffer is cut down to start at the string, and it
+# isn't lexed again until a chunk has brought the quote that closes it, so a long string is only
+# looked at twice however many chunks it's spread over
+def iter_lexemes(file: TextIO, chunk_size: int = 65536) -> Iterator[List[Lexeme]]:
+    buffer = ''
+    line = 1
+    # the lexemes before the open string on its line, which are yielded with the rest of the line
+    line_start: List[Lexeme] = []
+    quote = None # the open string's quote, while buffer starts with it
+    searched = 1 # how much of buffer has been looked through for the closing quote
+    while True:
+        chunk = file.read(chunk_size)
+        buffer += chunk
+        if quote is not None and chunk:
+            if buffer.find(quote, searched) == -1:
+                searched = len(buffer)
+                continue
+            quote = None
+        if chunk:
+            if '\n' not in chunk:
+                continue
+            cut = buffer.rfind('\n') + 1
+        else:
+            cut = len(buffer) # end of the file, so whatever is left has to lex on its own
+        lexemes = list(line_start)
+        try:
+            code_to_lexemes(buffer[:cut], lexemes, line)
+        except SyntaxError as error:
+            if not (chunk and str(error).endswith(unclosed_string)):
+                raise
+            buffer = buffer[error.offset:]
+            quote = buffer[0]
+            searched = 1
+            lines = [index for index, lex in enumerate(lexemes) if lex.token is Token.NEWLINE]
+            if not lines:
+                line_start = lexemes
+                continue
+            line = lexemes[lines[-1]].line + 1
+            line_start = lexemes[lines[-1] + 1:]
+            yield lexemes[:lines[-1] + 1]
+            continue
+        buffer = buffer[cut:]
+        line_start = []
+        if lexemes:
+            line = lexemes[-1].line + 1 if lexemes[-1].token is Token.NEWLINE else line
+            yield lexemes
+        if not chunk:
+            return
+
+# sources smaller than this lex faster on their own than it takes to start the processes
+parallel_lex_threshold = 1024 * 1024
+
+# lexes code in pieces on workers processes and puts the pieces back together, giving the same
+# TokenStream as code_to_lexemes(code, TokenStream()). code is only split after a newline, which
+# lexemes never cross unless the newline is in a string, and then the piece before it ends in an
+# unclosed string. any error in any piece means the whole thing is lexed again on its own, which
+# either works or raises the right error with the right line.
+# the per lexeme work of putting the pieces together happens on the workers too: each one lexes its
+# piece from the line it starts on, counted from the newlines before it, and once the constant pools
+# have been merged (which is per constant, not per lexeme) it remaps its piece's constant indexes.
+# a newline in a string isn't a line, so that count is only right up to the first string with one
+# in it, and the pieces after it get their lines moved back by the difference here
+def code_to_lexemes_parallel(code: str, workers: int) -> TokenStream:
+    if workers <= 1 or len(code) < parallel_lex_threshold:
+        return code_to_lexemes(code, TokenStream())
+    pieces = split_lines(code, workers * 4)
+    starts = []
+    line = 1
+    for piece in pieces:
+        starts.append(line)
+        line += piece.count('\n')
+    lexemes = TokenStream()
+    try:
+        with ProcessPoolExecutor(workers) as executor:
+            streams = list(executor.map(lex_piece, pieces, starts))
+            mappings = [lexemes.add_constants(constants) for _, _, _, constants in streams]
+            values = list(executor.map(remap_values, [stream[2] for stream in streams], mappings))
+    except Exception:
+        return code_to_lexemes(code, TokenStream())
+    line = 1
+    newline = Token.NEWLINE.value
+    for (tokens, lines, _, _), start, piece_values in zip(streams, starts, values):
+        lexemes.tokens += tokens
+        lexemes.lines += array('I', map((line - start).__add__, lines)) if line != start else lines
+        lexemes.values += piece_values
+        line += tokens.count(newline)
+    return lexemes
 
-def parse_statement(lexemes: List[Lexeme], start: int, varmap: VarMap) -> int:
+# the arrays and constants of the piece's TokenStream, which is all that has to be sent back
+def lex_piece(code: str, line: int = 1) -> Tuple[array, array, array, List]:
+    stream = code_to_lexemes(code, TokenStream(), line)
+    return stream.tokens, stream.lines, stream.values, stream.constants
+
+# about count pieces of code, each ending right after a newline (apart from the last)
+def split_lines(code: str, count: int) -> List[str]:
+    pieces = []
+    size = len(code) // count + 1
+    start = 0
+    while start < len(code):
+        end = code.find('\n', start + size) + 1 or len(code)
+        pieces.append(code[start:end])
+        start = end
+    return pieces
+
+engines = ['tree', 'vm', 'python']
+
+# runs file one top level statement at a time as it's read, instead of lexing and parsing the whole
+# program first. statements that are complete by the end of a chunk are parsed and run together,
+# so memory depends on the chunk size and the biggest block rather than the size of the program
+def run_stream(file: TextIO, engine: str = 'tree', chunk_size: int = 65536, opt_level: int = 1, output: Output = None):
+    varmap = VarMap() # shared by every statement, so top level variables carry over
+    pending: List[Lexeme] = []
+    depth = 0 # how many blocks are open at the end of pending
+    for lexemes in iter_lexemes(file, chunk_size):
+        complete = 0
+        for lex in lexemes:
+            pending.append(lex)
+            if lex.token is Token.KEYWORD and lex.lexeme in ['if', 'while', 'for']:
+                depth += 1
+            elif lex.token is Token.KEYWORD and lex.lexeme == 'end':
+                depth -= 1
+            elif lex.token is Token.NEWLINE and depth <= 0:
+                complete = len(pending)
+        if complete:
+            run_program(build_program(pending[:complete]), engine, varmap, opt_level, output)
+            pending = pending[complete:]
+    if pending:
+        run_program(build_program(pending), engine, varmap, opt_level, output)
+
+def parse_program(lexemes: List[Lexeme] | TokenStream, engine: str = 'tree'):
+    run_program(build_program(lexemes), engine)
+
+# "tree" runs the syntax tree with the closure compiling evaluator, "vm" compiles it to bytecode first
+# and "python" turns it into python source for cpython to compile (see transpiler.py).
+# a varmap that already has variables in it lets the program use them. see optimizer.py for opt_level,
+# and output.py for where printed text goes (stdout by default). with metrics, the time spent in each
+# phase is added to it, and the tree engine counts what it runs (see metrics.py)
+def run_program(program: Program, engine: str = 'tree', varmap: VarMap = None, opt_level: int = 1, output: Output = None, metrics: Metrics = None):
+    if varmap is None:
+        varmap = VarMap()
+    with timed(metrics, 'compile'):
+        program = optimize(resolve(program, varmap), opt_level, varmap)
+        if metrics is not None:
+            metrics.record_scopes(varmap)
+        if engine == 'vm':
+            code = compile_program(program)
+        elif engine == 'python':
+            code = transpile(program, varmap)
+            try:
+                function = load_python(code)
+            except (SyntaxError, RecursionError, MemoryError):
+                # too deeply nested for python's compiler, so it runs on the tree engine instead
+                engine = 'tree'
+    with timed(metrics, 'execute'):
+        if engine == 'vm':
+            VirtualMachine(varmap, output).run(code)
+        elif engine == 'python':
+            PythonRunner(varmap, output).run(code, function)
+        elif metrics is not None:
+            MetricsEvaluator(varmap, output, metrics).run(program)
+        else:
+            Evaluator(varmap, output).run(program)
+
+# turns the lexemes into a syntax tree once, so loops don't re-parse their bodies on every iteration
+def build_program(lexemes: List[Lexeme] | TokenStream) -> Program:
+    blocks = match_blocks(lexemes)
+    return Program(parse_block(lexemes, blocks, 0, len(lexemes)), line=1)
+
+def parse_block(lexemes: List[Lexeme], blocks: Dict[int, int], start: int, end: int) -> List[Node]:
+    statements = []
+    i = start
+    while i < end:
+        statement, i = parse_statement(lexemes, blocks, i)
+        if statement is not None:
+            statements.append(statement)
+    return statements
+
+def parse_statement(lexemes: List[Lexeme], blocks: Dict[int, int], start: int) -> Tuple[Node | None, int]:
     lex = lexemes[start]
     match lex.token:
             case Token.KEYWORD if lex.lexeme == 'var':
-                return parse_declare(lexemes, start, varmap)
+                return parse_declare(lexemes, start)
             case Token.KEYWORD if lex.lexeme == 'print':
-                return parse_print(lexemes, start, varmap)
+                return parse_print(lexemes, start)
             case Token.KEYWORD if lex.lexeme == 'if':
-                return parse_if(lexemes, start, varmap)
+                return parse_if(lexemes, blocks, start)
             case Token.KEYWORD if lex.lexeme == 'while':
-                return parse_while(lexemes, start, varmap)
+                return parse_while(lexemes, blocks, start)
             case Token.KEYWORD if lex.lexeme == 'for':
-                return parse_for(lexemes, start, varmap)
+                return parse_for(lexemes, blocks, start)
             case Token.IDENTIFIER:
-                return parse_assign(lexemes, start, varmap)
+                return parse_assign(lexemes, start)
             case Token.NEWLINE:
-                return start + 1
+                return None, start + 1
             case _:
                 raise SyntaxError(f'Line {lex.line}: invalid syntax for statement')
 
-def parse_declare(lexemes: List[Lexeme], start: int, varmap: VarMap) -> int:
+def parse_declare(lexemes: List[Lexeme], start: int) -> Tuple[Declare, int]:
     if start + 1 >= len(lexemes):
         raise SyntaxError(f'Line {lexemes[start].line}: expected identifier')
     
     identifier = lexemes[start+1]
     if identifier.token is not Token.IDENTIFIER:
         raise SyntaxError(f'Line {lexemes[start].line}: expected identifier')
-    elif identifier.lexeme in varmap:
-        raise NameError(f'Line {lexemes[start].line}: identifier "{identifier.lexeme}" already taken')
     
     if start + 2 >= len(lexemes):
         raise SyntaxError(f'Line {lexemes[start].line}: expected "=" for declaration')
     operator = lexemes[start+2]
-    if operator.lexeme != '=':
+    if not matches(operator, '='):
         raise SyntaxError(f'Line {lexemes[start].line}: expected "=" for declaration')
     
     if start + 3 >= len(lexemes):
         raise SyntaxError(f'Line {lexemes[start].line}: expected expression')
     expression_parts: List[Lexeme] = build_expression(lexemes, start+3)
-    expression = parse_expression(expression_parts, varmap)
-    varmap.create_var(identifier.lexeme, expression)
-    return start + 3 + len(expression_parts)
+    expression = parse_expression(expression_parts, lexemes[start].line)
+    return Declare(identifier.lexeme, expression, line=lexemes[start].line), start + 3 + len(expression_parts)
 
-def parse_assign(lexemes: List[Lexeme], start: int, varmap: VarMap) -> int:
+def parse_assign(lexemes: List[Lexeme], start: int) -> Tuple[Assign, int]:
     var = lexemes[start]
-    if var.lexeme not in varmap:
-        raise SyntaxError(f'Line {lexemes[start].line}: identifier "{var.lexeme}" not defined') # ERROR identifier not found
     
     if start + 1 >= len(lexemes):
         raise SyntaxError(f'Line {lexemes[start].line}: expected "=" for assignment')
     operator = lexemes[start+1]
-    if operator.lexeme != '=':
+    if not matches(operator, '='):
         raise SyntaxError(f'Line {lexemes[start].line}: expected "=" for assignment')
     
     if start + 2 >= len(lexemes):
         raise SyntaxError(f'Line {lexemes[start].line}: expected expression')
     expression_parts: List[Lexeme] = build_expression(lexemes, start+2)
-    expression = parse_expression(expression_parts, varmap)
-    varmap[var.lexeme] = expression
-    return start + 2 + len(expression_parts)
+    expression = parse_expression(expression_parts, lexemes[start].line)
+    return Assign(var.lexeme, expression, line=var.line), start + 2 + len(expression_parts)
 
-def parse_print(lexemes: List[Lexeme], start: int, varmap: VarMap) -> int:
+def parse_print(lexemes: List[Lexeme], start: int) -> Tuple[Print, int]:
     if start + 1 >= len(lexemes):
         raise SyntaxError(f'Line {lexemes[start].line}: expected ( after print')
     left_parenthesis = lexemes[start+1]
-    if left_parenthesis.lexeme != '(':
+    if not matches(left_parenthesis, '('):
         raise SyntaxError(f'Line {lexemes[start].line}: expected ( after print')
     
     if start + 2 >= len(lexemes):
         raise SyntaxError(f'Line {lexemes[start].line}: expected expression')
-    if lexemes[start+2].lexeme == ')':
-        print()
-        return start + 3
+    if matches(lexemes[start+2], ')'):
+        return Print(None, line=lexemes[start].line), start + 3
     expression_parts = build_expression(lexemes, start+2)
-    expression = parse_expression(expression_parts, varmap)
-    print(expression)
-    return start + 3 + len(expression_parts)
+    expression = parse_expression(expression_parts, lexemes[start].line)
 
-def parse_if(lexemes: List[Lexeme], start: int, varmap: VarMap) -> int:
-    keyword_index = start
-    start_execution = start
-    while lexemes[keyword_index].lexeme != 'end':
-        match lexemes[keyword_index].lexeme:
-            case 'if' | 'elif':
-                if keyword_index + 1 >= len(lexemes):
-                    raise SyntaxError(f'Line {lexemes[keyword_index].line}: expected (')
-                left_parenthesis = lexemes[keyword_index+1]
-                if left_parenthesis.lexeme != '(':
-                    raise SyntaxError(f'Line {lexemes[keyword_index].line}: expected (')
-                
-                if keyword_index + 2 >= len(lexemes):
-                    raise SyntaxError(f'Line {lexemes[keyword_index].line}: expected expression')
-                expression_parts = build_expression(lexemes, keyword_index+2)
-
-                if keyword_index + 2 + len(expression_parts) >= len(lexemes):
-                    raise SyntaxError(f'Line {lexemes[keyword_index].line}: expected )')
-                right_parenthesis = lexemes[keyword_index+2+len(expression_parts)]
-                if right_parenthesis.lexeme != ')':
-                    raise SyntaxError(f'Line {lexemes[keyword_index].line}: expected )')
-
-                expression = parse_expression(expression_parts, varmap)
-                if expression is True:
-                    start_execution = keyword_index + 3 + len(expression_parts)
-                    break
-                elif expression is False:
-                    keyword_index = find_end(lexemes, keyword_index + 3 + len(expression_parts), True)
-                else:
-                    raise TypeError(f'Line {lexemes[keyword_index].line}: expected boolean expression in "if" statement')
-            case 'else':
-                start_execution = keyword_index + 1
-                break
-    i = start_execution
-    end_index = find_end(lexemes, i, True)
-    varmap.open_scope()
-    while i < end_index:
-        i = parse_statement(lexemes, i, varmap)
-    varmap.close_scope()
-    if lexemes[end_index] == 'end':
-        return end_index + 1
-    else:
-        return find_end(lexemes, end_index) + 1
+    right_parenthesis_index = start + 2 + len(expression_parts)
+    if right_parenthesis_index >= len(lexemes) or not matches(lexemes[right_parenthesis_index], ')'):
+        raise SyntaxError(f'Line {lexemes[start].line}: expected )')
+    return Print(expression, line=lexemes[start].line), right_parenthesis_index + 1
 
-def parse_while(lexemes: List[Lexeme], start: int, varmap: VarMap) -> int:
-    if start + 1 > len(lexemes):
+# parses the "(<expression>)" after if, elif and while. returns the condition and the index the body starts at
+def parse_condition(lexemes: List[Lexeme], start: int) -> Tuple[Node, int]:
+    if start + 1 >= len(lexemes):
         raise SyntaxError(f'Line {lexemes[start].line}: expected (')
     left_parenthesis = lexemes[start+1]
-    if left_parenthesis.lexeme != '(':
+    if not matches(left_parenthesis, '('):
         raise SyntaxError(f'Line {lexemes[start].line}: expected (')
 
-    if start + 2 > len(lexemes):
+    if start + 2 >= len(lexemes):
         raise SyntaxError(f'Line {lexemes[start].line}: expected expression')
     expression_parts = build_expression(lexemes, start+2)
 
-    if start + start+2+len(expression_parts) > len(lexemes):
+    if start + 2 + len(expression_parts) >= len(lexemes):
         raise SyntaxError(f'Line {lexemes[start].line}: expected )')
     right_parenthesis = lexemes[start+2+len(expression_parts)]
-    if right_parenthesis.lexeme != ')':
+    if not matches(right_parenthesis, ')'):
         raise SyntaxError(f'Line {lexemes[start].line}: expected )')
 
-    body_index = start + 3 + len(expression_parts)
-
-    end_index = find_end(lexemes, body_index)
-    expression = parse_expression(expression_parts, varmap)
-    while expression is True:
-        i = body_index
-        varmap.open_scope()
-        while i < end_index:
-            i = parse_statement(lexemes, i, varmap)
-        varmap.close_scope()
-        expression = parse_expression(expression_parts, varmap)
-    
-    return end_index + 1
-
-def parse_for(lexemes: List[Lexeme], start: int, varmap: VarMap) -> int:
-    varmap.open_scope() # dumb solution, but this is so the variable declared in for loop gets deleted
+    expression = parse_expression(expression_parts, lexemes[start].line)
+    return expression, start + 3 + len(expression_parts)
 
-    if start + 1 > len(lexemes):
-        raise SyntaxError(f'Line {lexemes[start].line}: expected (')
+def parse_if(lexemes: List[Lexeme], blocks: Dict[int, int], start: int) -> Tuple[If, int]:
+    node = If([], line=lexemes[start].line)
+    keyword_index = start
+    while True:
+        keyword = lexemes[keyword_index]
+        match keyword.lexeme:
+            case 'if' | 'elif':
+                condition, body_index = parse_condition(lexemes, keyword_index)
+                end_index = blocks[keyword_index]
+                body = parse_block(lexemes, blocks, body_index, end_index)
+                node.branches.append(Branch(condition, body, line=keyword.line))
+                keyword_index = end_index
+            case 'else':
+                end_index = blocks[keyword_index]
+                node.orelse = parse_block(lexemes, blocks, keyword_index + 1, end_index)
+                return node, end_index + 1
+            case 'end':
+                return node, keyword_index + 1
+
+def parse_while(lexemes: List[Lexeme], blocks: Dict[int, int], start: int) -> Tuple[While, int]:
+    condition, body_index = parse_condition(lexemes, start)
+    end_index = blocks[start]
+    body = parse_block(lexemes, blocks, body_index, end_index)
+    return While(condition, body, line=lexemes[start].line), end_index + 1
+
+def parse_for(lexemes: List[Lexeme], blocks: Dict[int, int], start: int) -> Tuple[For, int]:
+    line = lexemes[start].line
+    if start + 1 >= len(lexemes):
+        raise SyntaxError(f'Line {line}: expected (')
     left_parenthesis = lexemes[start+1]
-    if left_parenthesis.lexeme != '(':
-        raise SyntaxError(f'Line {lexemes[start].line}: expected (')
+    if not matches(left_parenthesis, '('):
+        raise SyntaxError(f'Line {line}: expected (')
     
-    if start + 2 > len(lexemes):
-        raise SyntaxError(f'Line {lexemes[start].line}: expected ;')
-    semicolon1_index = parse_statement(lexemes, start + 2, varmap) # declare variable
-    if lexemes[semicolon1_index].lexeme != ';':
-        raise SyntaxError(f'Line {lexemes[start].line}: expected ;')
+    if start + 2 >= len(lexemes):
+        raise SyntaxError(f'Line {line}: expected ;')
+    init, semicolon1_index = parse_statement(lexemes, blocks, start + 2) # declare variable
+    if semicolon1_index >= len(lexemes) or not matches(lexemes[semicolon1_index], ';'):
+        raise SyntaxError(f'Line {line}: expected ;')
     
-    if semicolon1_index + 1 > len(lexemes):
-        raise SyntaxError(f'Line {lexemes[start].line}: expected expression')
+    if semicolon1_index + 1 >= len(lexemes):
+        raise SyntaxError(f'Line {line}: expected expression')
     expression_parts = build_expression(lexemes, semicolon1_index + 1)
+    condition = parse_expression(expression_parts, line)
 
-    if len(expression_parts) + semicolon1_index + 1 > len(lexemes):
-        raise SyntaxError(f'Line {lexemes[start].line}: expected ;')
     semicolon2_index = len(expression_parts) + semicolon1_index + 1
-    if lexemes[semicolon2_index].lexeme != ';':
-        raise SyntaxError(f'Line {lexemes[start].line}: expected ;')
+    if semicolon2_index + 1 >= len(lexemes) or not matches(lexemes[semicolon2_index], ';'):
+        raise SyntaxError(f'Line {line}: expected ;')
+
+    update, right_parenthesis_index = parse_statement(lexemes, blocks, semicolon2_index + 1)
+    if right_parenthesis_index >= len(lexemes) or not matches(lexemes[right_parenthesis_index], ')'):
+        raise SyntaxError(f'Line {line}: expected )')
+
+    body_index = right_parenthesis_index + 1
+    end_index = blocks[start]
+    body = parse_block(lexemes, blocks, body_index, end_index)
+    return For(init, condition, update, body, line=line), end_index + 1
+
+# True if lex is the given operator, punctuator or keyword (and not a string literal that happens to look like one)
+def matches(lex: Lexeme, text: str) -> bool:
+    return lex.token is not Token.LITERAL and lex.lexeme == text
+
+# matches up every block in one pass, so the parser never has to search for where a block ends.
+# maps the index of each if, elif and else to the index of the next elif, else or end in the same
+# if statement, and each while and for to the index of its end. unbalanced blocks are reported here,
+# before anything is parsed
+def match_blocks(lexemes: List[Lexeme] | TokenStream) -> Dict[int, int]:
+    blocks: Dict[int, int] = {}
+    # for every block that's still open: the index of its last if, elif, else, while or for
+    open_blocks: List[int] = []
+    for index, lex in enumerate(lexemes):
+        if lex.token is not Token.KEYWORD:
+            continue
+        match lex.lexeme:
+            case 'if' | 'while' | 'for':
+                open_blocks.append(index)
+            case 'elif' | 'else':
+                if not open_blocks or lexemes[open_blocks[-1]].lexeme not in ['if', 'elif']:
+                    if open_blocks and lexemes[open_blocks[-1]].lexeme == 'else':
+                        raise SyntaxError(f'Line {lex.line}: "{lex.lexeme}" after "else"')
+                    raise SyntaxError(f'Line {lex.line}: "{lex.lexeme}" without matching "if"')
+                blocks[open_blocks[-1]] = index
+                open_blocks[-1] = index
+            case 'end':
+                if not open_blocks:
+                    raise SyntaxError(f'Line {lex.line}: "end" without matching "if", "while" or "for"')
+                blocks[open_blocks.pop()] = index
+    if open_blocks:
+        opener = lexemes[open_blocks[-1]]
+        raise SyntaxError(f'Line {opener.line}: expected "end" for "{opener.lexeme}"')
+    return blocks
 
-    statement_index = semicolon2_index + 1
-    body_index = statement_index + 1 + len(build_expression(lexemes, statement_index))
-    if body_index - 1 > len(lexemes) or lexemes[body_index - 1].lexeme != ')':
-        raise SyntaxError(f'Line {lexemes[start].line}: expected )')
-    # uses build_expression() to find ')'
-
-    end_index = find_end(lexemes, body_index)
-    expression = parse_expression(expression_parts, varmap)
-    while expression is True:
-        i = body_index
-        varmap.open_scope()
-        while i < end_index:
-            i = parse_statement(lexemes, i, varmap)
-        varmap.close_scope()
-        parse_statement(lexemes, statement_index, varmap)
-        expression = parse_expression(expression_parts, varmap)
-
-    varmap.close_scope()
-    return end_index + 1
-
-# finds the index of the corresponding "end" keyword. used for if statements and loops
-def find_end(lexemes: List[Lexeme], start: int, include_elif: bool = False) -> int:
-    open_keywords = ['if', 'while', 'for']
-    opened = 0
-    index = start
-    for lex in lexemes[start:]:
-        if lex.lexeme in open_keywords:
-            opened += 1
-        elif lex.lexeme == 'end' and opened <= 0:
-            return index
-        elif include_elif and opened <= 0 and (lex.lexeme == 'elif' or lex.lexeme == 'else'):
-            return index
-        elif lex.lexeme == 'end' and opened > 0:
-            opened -= 1
-        index += 1
-    raise SyntaxError(f'Line {lexemes[start].line}: expected "end"')
-    
 def build_expression(lexemes: List[Lexeme], start: int) -> List[Lexeme]:
     expression = []
     parentheses = 0
-    for lex in lexemes[start:]:
+    for index in range(start, len(lexemes)):
+        lex = lexemes[index]
         if lex.token is Token.KEYWORD:
             raise SyntaxError(f'Line {lexemes[start].line}: invalid expression')
-        elif lex.token is Token.NEWLINE or lex.lexeme == ';':
+        elif lex.token is Token.NEWLINE or matches(lex, ';'):
             return expression
-        elif lex.lexeme == ')' and parentheses <= 0:
+        elif matches(lex, ')') and parentheses <= 0:
             return expression
-        elif lex.lexeme == ')' and parentheses > 0:
+        elif matches(lex, ')') and parentheses > 0:
             parentheses -= 1
-        elif lex.lexeme == '(':
+        elif matches(lex, '('):
             parentheses += 1
         expression.append(lex)
     return expression
 
 # https://en.wikipedia.org/wiki/Shunting_yard_algorithm
 # SHOUTOUT TO DIJKSTRA THE GOAT
-def parse_expression(parts: List[Lexeme], varmap: VarMap):
-    output_stack: List[Lexeme] = []
+# builds the expression's tree instead of evaluating it, so it only has to run once
+def parse_expression(parts: List[Lexeme], line: int) -> Node:
+    if not parts:
+        raise SyntaxError(f'Line {line}: expected expression')
+    output_stack: List[Node] = []
     operator_stack: List[Lexeme] = []
-    
 
     for lex in parts:
         if lex.token is Token.LITERAL:
-            output_stack.append(lex.lexeme)
+            output_stack.append(Literal(lex.lexeme, line=lex.line))
         elif lex.token is Token.IDENTIFIER:
-            if lex.lexeme not in varmap:
-                raise NameError(f'Line {lex.line}: identifier "{lex.lexeme}" not defined')
-            output_stack.append(varmap[lex.lexeme])
+            output_stack.append(Name(lex.lexeme, line=lex.line))
         elif lex.token is Token.OPERATOR:
-            while operator_stack and operator_stack[-1] != '(' and not Lexeme.has_higher_precedence(lex.lexeme, operator_stack[-1]):
-                result = parse_operation(output_stack, operator_stack.pop())
-                output_stack.append(result)
-            operator_stack.append(lex.lexeme)
-        elif lex.lexeme == '(':
-            operator_stack.append(lex.lexeme)
-        elif lex.lexeme == ')':
-            while operator_stack[-1] != '(':
-                result = parse_operation(output_stack, operator_stack.pop())
-                output_stack.append(result)
+            if lex.lexeme not in precedence:
+                raise SyntaxError(f'Line {lex.line}: invalid expression')
+            while operator_stack and not matches(operator_stack[-1], '(') and not Lexeme.has_higher_precedence(lex.lexeme, operator_stack[-1].lexeme):
+                parse_operation(output_stack, operator_stack.pop())
+            operator_stack.append(lex)
+        elif matches(lex, '('):
+            operator_stack.append(lex)
+        elif matches(lex, ')'):
+            while not matches(operator_stack[-1], '('):
+                parse_operation(output_stack, operator_stack.pop())
             #assert there is a left parenthesis at the top of the operator stack
             operator_stack.pop()
     for operator in operator_stack[::-1]:
-        if operator == '(':
+        if matches(operator, '('):
             raise SyntaxError(f'Line {lex.line}: unclosed parentheses in expression')
-        result = parse_operation(output_stack, operator)
-        output_stack.append(result)
+        parse_operation(output_stack, operator)
     if len(output_stack) != 1:
         raise SyntaxError(f'Line {lex.line}: invalid expression')
     return output_stack[0]
 
-def parse_operation(output_stack: List[Lexeme], operator: str):
-    operations = {
-        '+': lambda t1, t2: t1 + t2,
-        '-': lambda t1, t2: t1 - t2,
-        '*': lambda t1, t2: t1 * t2,
-        '/': lambda t1, t2: t1 / t2,
-        '%': lambda t1, t2: t1 % t2,
-        '==': lambda t1, t2: t1 == t2,
-        '<': lambda t1, t2: t1 < t2,
-        '>': lambda t1, t2: t1 > t2,
-        '<=': lambda t1, t2: t1 <= t2,
-        '>=': lambda t1, t2: t1 >= t2,
-        '!=': lambda t1, t2: t1 != t2,
-        'and': lambda t1, t2: t1 and t2,
-        'or': lambda t1, t2: t1 or t2
-    }
-
-    if operator == '!':
-        return not output_stack.pop()
+# pops the operator's operands off the output stack and pushes the node that combines them
+def parse_operation(output_stack: List[Node], operator: Lexeme):
+    if operator.lexeme == '!':
+        if not output_stack:
+            raise SyntaxError(f'Line {operator.line}: invalid expression')
+        output_stack.append(UnaryOp('!', output_stack.pop(), line=operator.line))
     else:
+        if len(output_stack) < 2:
+            raise SyntaxError(f'Line {operator.line}: invalid expression')
         term2 = output_stack.pop()
         term1 = output_stack.pop()
-        if type(term1) is str or type(term2) is str:
-            term1 = str(term1)
-            term2 = str(term2)
-        answer = operations[operator](term1, term2)
-        if type(answer) is float and answer.is_integer():
-            answer = int(answer)
-        return answer
+        output_stack.append(BinaryOp(operator.lexeme, term1, term2, line=operator.line))
 
 def main():
-    if len(sys.argv) < 2:
+    arg_parser = argparse.ArgumentParser(description='run a .skibidi program')
+    arg_parser.add_argument('file', nargs='?', help='the program to run, or - to read it from stdin')
+    arg_parser.add_argument('--engine', choices=engines, default='tree', help='how to run the program (default: tree)')
+    arg_parser.add_argument('--disassemble', action='store_true', help='print the bytecode for the program instead of running it')
+    arg_parser.add_argument('--dump-python', action='store_true', help='print the python source --engine=python would run instead of running it')
+    arg_parser.add_argument('--opt-level', type=int, choices=levels, default=1, help='0 runs the program as written, 1 folds constants and drops dead branches (default: 1)')
+    arg_parser.add_argument('--profile', action='store_true', help='print how many times each line ran and how long it took to stderr (tree engine only)')
+    arg_parser.add_argument('--profile-stacks', metavar='FILE', help='with --profile, also write the time spent in nested blocks as collapsed stacks for flamegraph tools')
+    arg_parser.add_argument('--metrics', metavar='FILE', help='write what the program ran and how long each phase took to FILE when it exits (statement counts with the tree engine only)')
+    arg_parser.add_argument('--metrics-format', choices=metric_formats, default='json', help='format of the --metrics file: json or prometheus text (default: json)')
+    arg_parser.add_argument('--output', metavar='FILE', help='write what the program prints to FILE instead of stdout')
+    arg_parser.add_argument('--buffer-size', type=int, default=default_buffer_size, help=f'characters of output kept before writing them out, 0 writes every line right away (default: {default_buffer_size})')
+    arg_parser.add_argument('--stream', action='store_true', help='run each top level statement as soon as it has been read')
+    arg_parser.add_argument('--chunk-size', type=int, default=65536, help='characters read at a time with --stream (default: 65536)')
+    arg_parser.add_argument('--lex-workers', type=int, default=1, help=f'processes to lex sources of {parallel_lex_threshold // (1024 * 1024)} MB or more with (default: 1)')
+    arg_parser.add_argument('--mmap', action='store_true', help="map the file into memory and lex it as bytes instead of reading it into a string (ignores --lex-workers)")
+    arg_parser.add_argument('--repl', action='store_true', help='read statements from an interactive prompt and run them as they are entered')
+    arg_parser.add_argument('--serve', metavar='SOCKET', help='answer JSON requests with programs in them, one per line, on this unix socket or - for stdin and stdout (see server.py)')
+    arg_parser.add_argument('--shared-session', action='store_true', help='with --serve, run every connection against the same variables instead of one set per connection')
+    arg_parser.add_argument('--session-cache-size', type=int, default=256, help='compiled programs a --repl or --serve session keeps for when they are sent again (default: 256)')
+    arg_parser.add_argument('--max-steps', type=int, help='with --repl or --serve, stop a program after this many loop iterations (tree and vm engines only)')
+    arg_parser.add_argument('--max-time', type=float, help='with --repl or --serve, stop a program after this many seconds (tree and vm engines only)')
+    arg_parser.add_argument('--no-cache', action='store_true', help="don't read or write the compiled program cache")
+    arg_parser.add_argument('--clear-cache', action='store_true', help='delete everything in the compiled program cache first')
+    arg_parser.add_argument('--cache-dir', help='where to keep compiled programs (default: $SKIBIDI_CACHE_DIR or ~/.cache/skibidi)')
+    arg_parser.add_argument('--cache-size', type=int, default=64, help='how many MB the cache can grow to (default: 64)')
+    args = arg_parser.parse_args()
+    sys.tracebacklimit = 0 # this is to hide python's traceback on errors
+    if args.profile and (args.engine != 'tree' or args.stream):
+        arg_parser.error('--profile only works with the tree engine and without --stream')
+    if args.metrics and (args.stream or args.profile):
+        arg_parser.error("--metrics doesn't work with --stream or --profile")
+    if (args.max_steps is not None or args.max_time is not None) and (args.engine == 'python' or not (args.repl or args.serve)):
+        arg_parser.error('--max-steps and --max-time only work with --repl or --serve, and not with the python engine')
+    cache = None if args.no_cache else ProgramCache(args.cache_dir, args.cache_size * 1024 * 1024)
+    if args.clear_cache:
+        ProgramCache(args.cache_dir).clear()
+    if args.repl or args.serve:
+        serve(args)
+        return
+    if args.file is None:
+        return
+    if args.disassemble:
+        print(disassemble(compile_program(optimize(resolve(load_program(args.file, cache), VarMap()), args.opt_level))))
+        return
+    if args.dump_python:
+        varmap = VarMap()
+        print(transpile(optimize(resolve(load_program(args.file, cache), varmap), args.opt_level, varmap), varmap).source, end='')
         return
-    file_path = sys.argv[1]
-    with open(file_path, 'r') as file:
-        code = file.read()
-
-        lexemes: List[Lexeme] = code_to_lexemes(code)
-        # print('--parsing--')
-        parse_program(lexemes)
-        # print('--done parsing--')
+    output = FileOutput(args.output, args.buffer_size) if args.output else Output(sys.stdout, args.buffer_size)
+    metrics = Metrics() if args.metrics else None
+    try:
+        run_file(args, cache, output, metrics)
+    finally:
+        output.close()
+        # written even when the program fails, like the profile
+        if metrics is not None:
+            with open(args.metrics, 'w') as file:
+                metrics.write(file, args.metrics_format)
+
+# imported here since server.py imports this file
+def serve(args: argparse.Namespace):
+    import server
+    session = server.Session(args.engine, args.opt_level, args.session_cache_size, args.max_steps, args.max_time)
+    if args.repl:
+        server.repl(session)
+    elif args.serve == '-':
+        server.serve_lines(session, sys.stdin, sys.stdout)
+    else:
+        try:
+            server.serve_socket(args.serve, args.engine, args.opt_level, args.session_cache_size, args.shared_session, args.max_steps, args.max_time)
+        except FileExistsError as error:
+            sys.exit(f'error: {error}')
+
+def run_file(args: argparse.Namespace, cache: ProgramCache, output: Output, metrics: Metrics = None):
+    if args.stream:
+        if args.file == '-':
+            run_stream(sys.stdin, args.engine, args.chunk_size, args.opt_level, output)
+        else:
+            with open(args.file, 'r') as file:
+                run_stream(file, args.engine, args.chunk_size, args.opt_level, output)
+        return
+    program = load_program(args.file, cache, args.lex_workers, args.mmap, metrics)
+    # the tree lives until the program is done, so there's no point in the cycle collector walking it
+    # over and over while the program runs (a loaded tree would otherwise be walked for the first time then)
+    gc.freeze()
+    if args.profile:
+        profile_program(program, args.file, args.opt_level, args.profile_stacks, output)
+        return
+    run_program(program, args.engine, opt_level=args.opt_level, output=output, metrics=metrics)
+
+# the report is written even when the program fails, since that's often when it's wanted
+def profile_program(program: Program, file_path: str, opt_level: int = 1, stacks_path: str = None, output: Output = None):
+    profiler = ProfilingEvaluator(output=output)
+    try:
+        profiler.run(optimize(resolve(program, profiler.varmap), opt_level, profiler.varmap))
+    finally:
+        source_lines = None
+        if file_path != '-':
+            with open(file_path, 'r') as file:
+                source_lines = file.read().split('\n')
+        sys.stdout.flush()
+        profiler.report(sys.stderr, source_lines)
+        if stacks_path is not None:
+            with open(stacks_path, 'w') as file:
+                profiler.write_collapsed(file)
+
+# the source and its lexemes are only needed until the tree is built, so they're dropped once this returns.
+# with a cache, a program that has been parsed before is loaded from it instead of being lexed and parsed.
+# with use_mmap the file is mapped and lexed as bytes (see code_to_lexemes_bytes) instead of being read
+# into a str, which keeps the source out of memory (the OS pages it in and out as needed)
+def load_program(file_path: str, cache: ProgramCache = None, lex_workers: int = 1, use_mmap: bool = False, metrics: Metrics = None) -> Program:
+    if file_path == '-':
+        code = sys.stdin.read()
+    elif use_mmap:
+        with open(file_path, 'rb') as file, map_source(file) as code:
+            # text mode turns \r\n into \n, which lexing the bytes wouldn't
+            if code.find(b'\r') == -1:
+                return load_code(code, cache, code_to_lexemes_bytes, metrics)
+        with open(file_path, 'r') as file:
+            code = file.read()
+    else:
+        with open(file_path, 'r') as file:
+            code = file.read()
+    if lex_workers > 1:
+        return load_code(code, cache, lambda code: code_to_lexemes_parallel(code, lex_workers), metrics)
+    return load_code(code, cache, code_to_lexemes, metrics)
+
+def load_code(code: str | bytes, cache: ProgramCache, lex, metrics: Metrics = None) -> Program:
+    if cache is not None:
+        with timed(metrics, 'cache'):
+            program = cache.load(code)
+        if program is not None:
+            return program
+    with timed(metrics, 'lex'):
+        lexemes = lex(code)
+    with timed(metrics, 'parse'):
+        program = build_program(lexemes)
+    if cache is not None:
+        cache.store(code, program)
+    return program
+
+# an empty file can't be mapped
+def map_source(file) -> mmap.mmap | contextlib.nullcontext:
+    if os.fstat(file.fileno()).st_size == 0:
+        return contextlib.nullcontext(b'')
+    return mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
@@ -0,0 +1,83 @@
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+# every node remembers the line it started on so errors raised while running the tree
+# can still point back at the source
+
+@dataclass
+class Node:
+    line: int = field(default=0, kw_only=True)
+
+# expressions. types is filled in by inference.py with the python types the expression's value
+# can have, and stays None when nothing is known about them
+
+@dataclass
+class Literal(Node):
+    value: str | int | bool | float
+    types: Optional[frozenset] = field(default=None, kw_only=True)
+
+# slot is filled in by the resolver with the index of the variable in VarMap.values
+
+@dataclass
+class Name(Node):
+    name: str
+    slot: int = field(default=-1, kw_only=True)
+    types: Optional[frozenset] = field(default=None, kw_only=True)
+
+@dataclass
+class UnaryOp(Node):
+    operator: str
+    operand: Node
+    types: Optional[frozenset] = field(default=None, kw_only=True)
+
+@dataclass
+class BinaryOp(Node):
+    operator: str
+    left: Node
+    right: Node
+    types: Optional[frozenset] = field(default=None, kw_only=True)
+
+# statements
+
+@dataclass
+class Declare(Node):
+    name: str
+    value: Node
+    slot: int = field(default=-1, kw_only=True)
+
+@dataclass
+class Assign(Node):
+    name: str
+    value: Node
+    slot: int = field(default=-1, kw_only=True)
+
+@dataclass
+class Print(Node):
+    value: Optional[Node] # None for a bare print()
+
+# one "if (...)" or "elif (...)" arm of an if statement
+@dataclass
+class Branch(Node):
+    condition: Node
+    body: List[Node]
+
+@dataclass
+class If(Node):
+    branches: List[Branch]
+    orelse: Optional[List[Node]] = None
+
+@dataclass
+class While(Node):
+    condition: Node
+    body: List[Node]
+
+@dataclass
+class For(Node):
+    init: Node
+    condition: Node
+    update: Node
+    body: List[Node]
+
+@dataclass
+class Program(Node):
+    body: List[Node]
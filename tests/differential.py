@@ -0,0 +1,167 @@
+# runs the same programs every way there is to run them and checks they all print the same thing and
+# fail the same way. the reference is the tree engine at opt level 0 with ropes turned off: no type
+# specialized operations (optimizer.py, inference.py), no range() loops (loops.py) and no ropes
+# (rope.py), which all have to behave exactly like it. the programs are the examples in the repo and
+# generated ones that mix types, count in loops of every shape and build long strings
+# usage: python tests/differential.py [--count N] [--seed N] [--verbose]
+import os
+import sys
+import glob
+import random
+import argparse
+from typing import Dict, Iterator, List, Tuple
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, root)
+
+import rope
+from interpreter import Interpreter
+from skibidi_interpreter import engines
+from optimizer import levels
+
+# (engine, opt level, rope threshold). a threshold of 2 makes almost every concatenation a rope
+configurations: List[Tuple[str, int, int]] = [(engine, level, threshold) for engine in engines for level in levels for threshold in [rope.rope_threshold, 2]]
+reference = ('tree', 0, sys.maxsize)
+
+operators = ['+', '-', '*', '/', '%', '==', '!=', '<', '<=', '>', '>=', 'and', 'or']
+# mostly numbers, so most programs get far enough to be interesting before mixing types stops them
+literals = ['0', '1', '2', '7', '-3', '3.5', '2.0', '0.5'] * 3 + ['true', 'false', '"a"', '"7"', '""']
+
+def expression(generator: random.Random, names: List[str], depth: int = 0) -> str:
+    if depth > 2 or generator.random() < 0.3:
+        return generator.choice(literals + names * 2)
+    if generator.random() < 0.1:
+        # "!" binds looser than the other operators, so it needs parentheses of its own to be an operand
+        return f'(!({expression(generator, names, depth + 1)}))'
+    return f'({expression(generator, names, depth + 1)} {generator.choice(operators)} {expression(generator, names, depth + 1)})'
+
+# a for loop that may or may not be one loops.counted_loop turns into range(): the start, bound,
+# comparison and step vary, and the body sometimes changes the bound or the loop variable.
+# guard stops runaway loops with an error, which every configuration has to raise at the same point.
+# the body can have a loop of its own, once
+def loop(generator: random.Random, names: List[str], number: int | str, nested: bool = False) -> List[str]:
+    name = f'i{number}'
+    upwards = generator.random() < 0.5
+    comparison = generator.choice(['<', '<='] if upwards else ['>', '>='])
+    if generator.random() < 0.1:
+        comparison = generator.choice(['!=', '=='])
+    # mostly ones that can be counted loops, which is what there is to get wrong
+    usual = generator.random() < 0.8
+    step = generator.choice(['1', '2', '3'] if usual else ['0', '1.5', '-1'])
+    update = f'{name} = {name} {"+" if upwards else "-"} {step}'
+    if generator.random() < 0.1:
+        update = f'{name} = {step} + {name}'
+    start = generator.choice(['0', '1', '5', '-3'] if usual else ['2.5', '"3"', 'true'] + names)
+    bound = generator.choice(['10', '4', '-2', '7'] if generator.random() < 0.8 else ['7.5', '"8"'] + [f'{other} * 2' for other in names])
+    body = [f'print({name})']
+    if generator.random() < 0.3:
+        body.append(f'print({expression(generator, names + [name])})')
+    if names and generator.random() < 0.3:
+        body.append(f'{generator.choice(names)} = {expression(generator, names + [name])}')
+    if generator.random() < 0.1:
+        body.append(f'{name} = {name} + 1')
+    if not nested and generator.random() < 0.2:
+        body += loop(generator, names + [name], f'{number}n', nested=True)
+    return [
+        f'for (var {name} = {start}; {name} {comparison} {bound}; {update})',
+        *body,
+        'guard = guard + 1',
+        'if (guard > 50)',
+        'print(1 / 0)',
+        'end',
+        'end',
+    ]
+
+# a string appended to in a loop until it's long enough to be a rope, then used every way a string can be
+def append(generator: random.Random, names: List[str], number: int) -> List[str]:
+    name = f's{number}'
+    term = generator.choice([f'k{number}', '"ab"', '3.5', 'true'] + names)
+    return [
+        f'var {name} = "{generator.choice(["", "x", "ab"])}"',
+        f'for (var k{number} = 0; k{number} < {generator.choice([5, 40, 300])}; k{number} = k{number} + 1)',
+        f'{name} = {name} + {term}',
+        'end',
+        f'print({name} + {expression(generator, names)})',
+        f'print({name} == {name} + "")',
+        f'print({name} < "b")',
+    ]
+
+def program(generator: random.Random) -> str:
+    names: List[str] = []
+    lines = ['var guard = 0']
+    for number in range(generator.randint(2, 8)):
+        choice = generator.random()
+        if choice < 0.3 or not names:
+            lines.append(f'var v{number} = {expression(generator, names)}')
+            names.append(f'v{number}')
+        elif choice < 0.45:
+            lines.append(f'{generator.choice(names)} = {expression(generator, names)}')
+        elif choice < 0.7:
+            lines += loop(generator, names, number)
+        elif choice < 0.8:
+            lines += append(generator, names, number)
+        elif choice < 0.9:
+            lines += [f'if ({expression(generator, names)})', f'print({expression(generator, names)})', 'elif (true)', 'print("elif")', 'end']
+        else:
+            lines.append(f'print({expression(generator, names)})')
+    lines.append('print(' + ' + " " + '.join(names) + ')')
+    return '\n'.join(lines) + '\n'
+
+# what the program printed, followed by the error it stopped with if any
+def run(source: str, engine: str, opt_level: int, threshold: int) -> str:
+    saved = rope.rope_threshold
+    rope.rope_threshold = threshold
+    interpreter = Interpreter(engine=engine, opt_level=opt_level)
+    try:
+        interpreter.run(source)
+        error = ''
+    except Exception as exception:
+        error = f'{type(exception).__name__}: {exception}'
+    finally:
+        rope.rope_threshold = saved
+    return interpreter.output.getvalue() + error
+
+# the configurations whose result differs from the reference's, with what they gave
+def compare(source: str) -> Dict[Tuple[str, int, int], Tuple[str, str]]:
+    expected = run(source, *reference)
+    differences = {}
+    for configuration in configurations:
+        result = run(source, *configuration)
+        if result != expected:
+            differences[configuration] = (expected, result)
+    return differences
+
+def examples() -> Iterator[Tuple[str, str]]:
+    for path in sorted(glob.glob(os.path.join(root, '*.skibidi'))):
+        with open(path) as file:
+            yield os.path.basename(path), file.read()
+
+def generated(count: int, seed: int) -> Iterator[Tuple[str, str]]:
+    generator = random.Random(seed)
+    for number in range(count):
+        yield f'generated #{number} (seed {seed})', program(generator)
+
+def main():
+    arg_parser = argparse.ArgumentParser(description='check every engine and opt level against the reference')
+    arg_parser.add_argument('--count', type=int, default=500, help='generated programs to check (default: 500)')
+    arg_parser.add_argument('--seed', type=int, default=0, help='seed for generating them (default: 0)')
+    arg_parser.add_argument('--verbose', action='store_true', help='print every program that differs, not just the first few')
+    args = arg_parser.parse_args()
+
+    failures = 0
+    checked = 0
+    for name, source in [*examples(), *generated(args.count, args.seed)]:
+        checked += 1
+        differences = compare(source)
+        if differences:
+            failures += 1
+            if failures <= 3 or args.verbose:
+                print(f'--- {name}\n{source}')
+                for (engine, level, threshold), (expected, result) in differences.items():
+                    print(f'{engine} at opt level {level}, rope threshold {threshold}:\n  expected {expected!r}\n  got      {result!r}')
+    print(f'{checked} programs in {len(configurations)} configurations: {failures} differ from the reference')
+    if failures:
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
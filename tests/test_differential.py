@@ -0,0 +1,31 @@
+# the examples and a fixed set of generated programs, through differential.py. run with pytest
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from differential import compare, examples, generated
+from interpreter import Interpreter
+from skibidi_interpreter import engines
+
+@pytest.mark.parametrize('name, source', list(examples()))
+def test_example(name, source):
+    assert compare(source) == {}
+
+@pytest.mark.parametrize('name, source', list(generated(200, seed=1)))
+def test_generated(name, source):
+    assert compare(source) == {}
+
+# a program that fails while running doesn't leave its names declared: x would be given the slot t
+# was in, which still holds "secret", and then couldn't be declared again
+@pytest.mark.parametrize('engine', engines)
+def test_failed_run_undoes_declarations(engine):
+    interpreter = Interpreter(engine=engine)
+    interpreter.run('if (true)\nvar t = "secret"\nend\n')
+    with pytest.raises(ZeroDivisionError):
+        interpreter.run('var x = 1 / 0\n')
+    with pytest.raises(NameError):
+        interpreter.run('print(x)\n')
+    interpreter.run('var x = 2\nprint(x)\n')
+    assert interpreter.output.getvalue() == '2\n'
@@ -0,0 +1,55 @@
+# lexing bytes (--mmap) and lexing a chunk at a time (--stream) have to give the same lexemes as
+# lexing the whole text. run with pytest
+import io
+import os
+import sys
+import pytest
+
+sys.path[:0] = [os.path.dirname(os.path.dirname(os.path.abspath(__file__))), os.path.dirname(os.path.abspath(__file__))]
+
+from skibidi_interpreter import code_to_lexemes, code_to_lexemes_bytes, iter_lexemes
+from differential import examples
+
+# non-ascii lines are lexed as text, and a string on one that goes on past the line is lexed again
+sources = [
+    'var é = "a\nb"\nprint(é)\n',
+    'var a = 1\nprint("ü\n\nx" + "y")\nprint(a)\n',
+    'var s = "a" + "é\nb"\nvar t = 2\n',
+    'print("日本")\nvar ö = "\n"\nprint(ö)\n',
+]
+
+@pytest.mark.parametrize('source', sources)
+def test_bytes_match_text(source):
+    assert code_to_lexemes_bytes(source.encode('utf-8')) == code_to_lexemes(source)
+
+# the examples as they are, and with a non-ascii name and a multi-line string at the end of every
+# line. it only has to lex, and every line goes through the fallback with a string that goes on past it
+@pytest.mark.parametrize('name, source', list(examples()))
+def test_bytes_match_text_examples(name, source):
+    assert code_to_lexemes_bytes(source.encode('utf-8')) == code_to_lexemes(source)
+    source = source.replace('\n', ' ñ "é\nü"\n')
+    assert code_to_lexemes_bytes(source.encode('utf-8')) == code_to_lexemes(source)
+
+@pytest.mark.parametrize('source', ['print("é\n', 'var a = 1\nprint(ü + "\n\n', 'var ä = 1..2\n', 'var ö = 1 # 2\n'])
+def test_bytes_errors_match_text(source):
+    with pytest.raises(SyntaxError) as expected:
+        code_to_lexemes(source)
+    with pytest.raises(SyntaxError) as error:
+        code_to_lexemes_bytes(source.encode('utf-8'))
+    assert str(error.value) == str(expected.value)
+
+# strings that go on over chunks, with lexemes before them on their line and quotes of the other kind in them
+streamed = [
+    'var a = "x\ny\nz" + "q\n\nr"\nprint(a)\nprint(\'it"s\n\')\n',
+    'print("a\nb") print("c\nd\ne")\nvar x = 1\n',
+    'print(1)\nvar s = "' + 'abc\n' * 50 + '"\nprint(s)\n',
+]
+
+@pytest.mark.parametrize('source', streamed)
+@pytest.mark.parametrize('chunk_size', [1, 2, 3, 7, 64])
+def test_stream_matches_text(source, chunk_size):
+    assert [lex for lexemes in iter_lexemes(io.StringIO(source), chunk_size) for lex in lexemes] == code_to_lexemes(source)
+
+def test_stream_unclosed_string():
+    with pytest.raises(SyntaxError, match='Line 2: unclosed string literal'):
+        list(iter_lexemes(io.StringIO('print(1)\nprint("a\nb)\n'), 4))
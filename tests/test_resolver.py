@@ -0,0 +1,21 @@
+# errors the resolver reports before anything runs, the same on every engine. run with pytest
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from interpreter import Interpreter
+from skibidi_interpreter import engines
+
+# a for loop's update can't declare a variable, even when the loop would only run it once
+@pytest.mark.parametrize('engine', engines)
+@pytest.mark.parametrize('bound', [0, 1, 3])
+def test_declaration_in_for_update(engine, bound):
+    interpreter = Interpreter(engine=engine)
+    with pytest.raises(SyntaxError, match='Line 1: invalid expression'):
+        interpreter.run(f'for (var i = 0; i < {bound}; var j = 1)\ni = i + 1\nprint(i)\nend\n')
+    assert interpreter.output.getvalue() == ''
+    # and nothing it declared is left behind
+    interpreter.run('var i = 5\nvar j = 6\nprint(i + j)\n')
+    assert interpreter.output.getvalue() == '11\n'
@@ -0,0 +1,97 @@
+# what an Interpreter or a server Session is left with after a program fails, so the next one runs
+# against the right variables. run with pytest
+import os
+import sys
+import asyncio
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from interpreter import Interpreter, LimitExceeded
+from server import Session
+from skibidi_interpreter import engines
+
+# the values given to variables from before the failure stay, the declarations made by it don't
+@pytest.mark.parametrize('engine', engines)
+def test_runtime_error_keeps_assignments(engine):
+    interpreter = Interpreter(engine=engine)
+    interpreter.run('var a = 1\n')
+    with pytest.raises(ZeroDivisionError):
+        interpreter.run('a = 2\nvar b = 3\nvar c = 1 / 0\n')
+    interpreter.run('print(a)\nvar b = "b"\nvar c = "c"\nprint(b + c)\n')
+    assert interpreter.output.getvalue() == '2\nbc\n'
+
+@pytest.mark.parametrize('engine', engines)
+def test_compile_error_changes_nothing(engine):
+    interpreter = Interpreter(engine=engine)
+    interpreter.run('var a = 1\n')
+    with pytest.raises(NameError):
+        interpreter.run('var b = 2\nvar a = 3\n')
+    interpreter.run('var b = a + 1\nprint(b)\n')
+    assert interpreter.output.getvalue() == '2\n'
+
+@pytest.mark.parametrize('engine', ['tree', 'vm'])
+def test_limit_exceeded_undoes_declarations(engine):
+    interpreter = Interpreter(engine=engine)
+    with pytest.raises(LimitExceeded):
+        interpreter.run('var n = 0\nwhile (true)\nn = n + 1\nend\n', max_steps=50)
+    interpreter.run('var n = "again"\nprint(n)\n')
+    assert interpreter.output.getvalue() == 'again\n'
+
+def test_run_async_error_undoes_declarations():
+    interpreter = Interpreter(engine='vm')
+    with pytest.raises(ZeroDivisionError):
+        asyncio.run(interpreter.run_async('if (true)\nvar t = "secret"\nend\nvar x = 1 / 0\n'))
+    with pytest.raises(NameError):
+        asyncio.run(interpreter.run_async('print(x)\n'))
+
+@pytest.mark.parametrize('engine', ['tree', 'python'])
+def test_run_async_only_on_vm(engine):
+    with pytest.raises(ValueError):
+        asyncio.run(Interpreter(engine=engine).run_async('print(1)\n'))
+
+# a failed request isn't cached, so sending it again fails the same way instead of bringing back
+# the names it declared, and they can't be read in between
+@pytest.mark.parametrize('engine', engines)
+def test_session_failed_request(engine):
+    session = Session(engine)
+    assert session.run('if (true)\nvar t = "secret"\nend\n')['ok']
+    for _ in range(2):
+        response = session.run('var x = 1 / 0\n')
+        assert not response['ok'] and not response['cached']
+        assert response['error'].startswith('ZeroDivisionError')
+        response = session.run('print(x)\n')
+        assert not response['ok'] and response['error'].startswith('NameError')
+    response = session.run('var x = 2\nprint(x)\n')
+    assert response['ok'] and response['output'] == '2\n'
+
+@pytest.mark.parametrize('engine', engines)
+def test_session_caches_what_worked(engine):
+    session = Session(engine)
+    session.run('var a = 1\n')
+    assert not session.run('a = a + 1\nprint(a)\n')['cached']
+    response = session.run('a = a + 1\nprint(a)\n')
+    assert response['cached'] and response['output'] == '3\n'
+    # failing drops it, and the assignment made before the failure stays
+    assert not session.run('a = a + 1\nprint(1 / 0)\n')['ok']
+    assert not session.run('a = a + 1\nprint(1 / 0)\n')['cached']
+    assert session.run('print(a)\n')['output'] == '5\n'
+
+@pytest.mark.parametrize('engine', ['tree', 'vm'])
+def test_session_limits_on_cached_programs(engine):
+    session = Session(engine, max_steps=100)
+    source = 'var n = 0\nwhile (n < 1000)\nn = n + 1\nend\n'
+    for _ in range(2):
+        response = session.run(source)
+        assert not response['ok'] and not response['cached'] and 'more than 100 steps' in response['error']
+    source = 'var m = 0\nwhile (m < 10)\nm = m + 1\nend\nprint(m)\n'
+    assert session.run(source)['output'] == '10\n'
+    session.run('m = 0\n')
+    assert session.run('while (m < 10)\nm = m + 1\nend\n')['ok']
+    session.run('m = 0\n')
+    response = session.run('while (m < 10)\nm = m + 1\nend\n', max_steps=5)
+    assert response['cached'] and not response['ok'] and 'more than 5 steps' in response['error']
+
+def test_session_python_rejects_limits():
+    response = Session('python').run('print(1)\n', max_steps=10)
+    assert not response['ok'] and response['error'].startswith('ValueError')
@@ -0,0 +1,179 @@
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List
+from syntax_tree import Node, Literal, Name, UnaryOp, BinaryOp, Declare, Assign, Print, If, While, For, Program
+from operations import operations, binary_operations, number_operations, specialize
+from varmap import VarMap
+from output import Output
+from loops import counted_loop
+
+# turns a resolved program into python source, so cpython's own bytecode runs it. every variable
+# becomes a local of one function, named after the variable and its slot, so variables from different
+# scopes never clash. operators call the same functions the other engines use (see operations.py),
+# so string coercion and whole floats turning into ints work the same way. where inference.py has
+# worked out that python's own operator gives the same answer, that's used instead
+
+filename = '<skibidi>'
+
+# what the function for each operator is called in the generated code
+helper_names = {
+    '+': '_add', '-': '_sub', '*': '_mul', '/': '_div', '%': '_mod',
+    '==': '_eq', '<': '_lt', '>': '_gt', '<=': '_le', '>=': '_ge', '!=': '_ne',
+    'and': '_and', 'or': '_or',
+}
+
+# operators python has with the same meaning, used when the operands' types make the checks unnecessary
+infix_operators = ['+', '-', '*', '/', '%', '==', '<', '>', '<=', '>=', '!=']
+
+# lines[i] is the .skibidi line that line i + 1 of source came from
+@dataclass
+class PythonCode:
+    source: str = ''
+    lines: List[int] = field(default_factory=list)
+
+def if_error(line: int):
+    raise TypeError(f'Line {line}: expected boolean expression in "if" statement')
+
+class Transpiler(object):
+    def __init__(self, varmap: VarMap):
+        self.varmap = varmap
+        self.code = PythonCode()
+        self.parts: List[str] = []
+        self.indent = 0
+
+    def emit(self, text: str, line: int):
+        self.parts.append('    ' * self.indent + text)
+        self.code.lines.append(line)
+
+    def transpile(self, program: Program) -> PythonCode:
+        # variables declared before this program (by earlier statements of a stream) are copied in
+        # at the start and every top level variable is copied back out at the end
+        top_level = [(slot, self.name(name, slot)) for name, slot in self.varmap.varmaps[0].items()]
+        helpers = ', '.join(f'{name}={name}, {name}_number={name}_number' for name in helper_names.values())
+        self.emit(f'def _program(_values, _write, _str=str, _if_error=_if_error, {helpers}):', 0)
+        self.indent += 1
+        for slot, local in top_level:
+            self.emit(f'{local} = _values[{slot}]', 0)
+        self.emit('try:', 0)
+        self.indent += 1
+        self.transpile_block(program.body)
+        self.indent -= 1
+        self.emit('finally:', 0)
+        self.indent += 1
+        for slot, local in top_level:
+            self.emit(f'_values[{slot}] = {local}', 0)
+        self.emit('pass', 0)
+        self.code.source = '\n'.join(self.parts) + '\n'
+        return self.code
+
+    def name(self, name: str, slot: int) -> str:
+        return f'{name}_{slot}'
+
+    def transpile_block(self, statements: List[Node]):
+        if not statements:
+            self.emit('pass', 0)
+        for statement in statements:
+            self.transpile_statement(statement)
+
+    def transpile_statement(self, statement: Node):
+        match statement:
+            case Declare() | Assign():
+                self.emit(f'{self.name(statement.name, statement.slot)} = {self.transpile_expression(statement.value)}', statement.line)
+            case Print() if statement.value is None:
+                self.emit("_write('\\n')", statement.line)
+            case Print():
+                self.emit(f"_write(_str({self.transpile_expression(statement.value)}) + '\\n')", statement.line)
+            case If():
+                self.transpile_if(statement)
+            case While():
+                self.emit(f'while {self.transpile_expression(statement.condition)} is True:', statement.line)
+                self.transpile_body(statement.body)
+            case For() if (loop := counted_loop(statement)) is not None:
+                start = self.transpile_expression(loop.start)
+                bound = self.transpile_expression(loop.bound)
+                stop = bound if not loop.inclusive else f'{bound} {"+" if loop.step > 0 else "-"} 1'
+                step = f', {loop.step}' if loop.step != 1 else ''
+                self.emit(f'for {self.name(statement.init.name, loop.slot)} in range({start}, {stop}{step}):', statement.line)
+                self.transpile_body(statement.body)
+            case For():
+                self.transpile_statement(statement.init)
+                self.emit(f'while {self.transpile_expression(statement.condition)} is True:', statement.line)
+                self.transpile_body(statement.body + [statement.update])
+
+    # an elif chain stays flat, so long chains don't run into python's limit on indentation
+    def transpile_if(self, node: If):
+        for i, branch in enumerate(node.branches):
+            keyword = 'if' if i == 0 else 'elif'
+            self.emit(f'{keyword} (_condition := {self.transpile_expression(branch.condition)}) is True:', branch.line)
+            self.transpile_body(branch.body)
+            self.emit('elif _condition is not False:', branch.line)
+            self.indent += 1
+            self.emit(f'_if_error({branch.line})', branch.line)
+            self.indent -= 1
+        if node.orelse is not None:
+            self.emit('else:', node.line)
+            self.transpile_body(node.orelse)
+
+    def transpile_body(self, statements: List[Node]):
+        self.indent += 1
+        self.transpile_block(statements)
+        self.indent -= 1
+
+    def transpile_expression(self, expression: Node) -> str:
+        match expression:
+            case Literal():
+                return repr(expression.value)
+            case Name():
+                return self.name(expression.name, expression.slot)
+            case UnaryOp():
+                return f'(not {self.transpile_expression(expression.operand)})'
+            case BinaryOp():
+                left = self.transpile_expression(expression.left)
+                right = self.transpile_expression(expression.right)
+                operation = specialize(expression.operator, expression.left.types, expression.right.types)
+                if operation is operations[expression.operator] and expression.operator in infix_operators:
+                    return f'({left} {expression.operator} {right})'
+                if operation is number_operations[expression.operator]:
+                    return f'{helper_names[expression.operator]}_number({left}, {right})'
+                return f'{helper_names[expression.operator]}({left}, {right})'
+
+# expects a program that has been resolved against varmap
+def transpile(program: Program, varmap: VarMap) -> PythonCode:
+    return Transpiler(varmap).transpile(program)
+
+# the line of the program that was running when error was raised, or 0 if it wasn't in the program
+def error_line(error: BaseException, code: PythonCode) -> int:
+    line = 0
+    traceback = error.__traceback__
+    while traceback is not None:
+        if traceback.tb_frame.f_code.co_filename == filename:
+            line = code.lines[traceback.tb_lineno - 1]
+        traceback = traceback.tb_next
+    return line
+
+# compiles code into the function that runs it. raises SyntaxError or RecursionError for programs
+# python can't compile, like ones with more than 20 nested loops
+def load(code: PythonCode) -> Callable:
+    namespace: Dict = {helper_names[symbol]: operation for symbol, operation in binary_operations.items()}
+    namespace |= {helper_names[symbol] + '_number': operation for symbol, operation in number_operations.items()}
+    namespace['_if_error'] = if_error
+    exec(compile(code.source, filename, 'exec'), namespace)
+    return namespace['_program']
+
+class PythonRunner(object):
+    def __init__(self, varmap: VarMap = None, output: Output = None):
+        self.varmap = varmap if varmap is not None else VarMap()
+        self.output = output if output is not None else Output()
+
+    # function is what load(code) returned, if it has been loaded already
+    def run(self, code: PythonCode, function: Callable = None):
+        program = function if function is not None else load(code)
+        try:
+            program(self.varmap.values, self.output.write)
+        except Exception as error:
+            line = error_line(error, code)
+            # errors the language raises itself already start with their line
+            if line and not str(error).startswith('Line '):
+                error.add_note(f'raised on line {line}')
+            raise
+        finally:
+            self.output.flush()
@@ -1,38 +1,65 @@
-from typing import List, Dict
+from typing import List, Dict, Tuple
 
+# every variable lives in a slot of the values list. the scopes only map names to slots, so once
+# the resolver has given every name in a program its slot, running the program never has to look
+# a name up. scopes are a stack, so closing one frees its slots for the next scope to reuse
 class VarMap(object):
     def __init__(self):
-        self.varmaps: List[Dict[str, any]] = [{}]
+        self.varmaps: List[Dict[str, int]] = [{}]
+        self.values: List = []
+        self.next_slot = 0
+        self.peak_depth = 1 # the most scopes that have been open at once, for metrics.py
 
     def __contains__(self, key: str):
         for map in self.varmaps:
             if key in map:
                 return True
         return False
-    
+
     def __getitem__(self, key: str):
-        for map in self.varmaps[::-1]:
-            if key in map:
-                return map[key]
-        raise KeyError()
-    
+        return self.values[self.slot(key)]
+
     def __setitem__(self, key: str, value):
-        varmap = None
-        for map in self.varmaps[::-1]:
+        self.values[self.slot(key)] = value
+
+    def slot(self, key: str) -> int:
+        for map in reversed(self.varmaps):
             if key in map:
-                varmap = map
-                break
-        varmap[key] = value
-    
+                return map[key]
+        raise KeyError(key)
+
+    # gives key a slot in the innermost scope and returns it
+    def declare(self, key: str) -> int:
+        slot = self.next_slot
+        self.varmaps[-1][key] = slot
+        self.next_slot += 1
+        if slot == len(self.values):
+            # the values list is only ever grown in place, since compiled code holds on to it
+            self.values.append(None)
+        return slot
+
     def create_var(self, key: str, value):
-        self.varmaps[-1][key] = value
-    
+        self.values[self.declare(key)] = value
+
     def open_scope(self):
         self.varmaps.append({})
-    
+        if len(self.varmaps) > self.peak_depth:
+            self.peak_depth = len(self.varmaps)
+
     def close_scope(self):
-        self.varmaps.pop()
-    
+        self.next_slot -= len(self.varmaps.pop())
+
+    # the scopes as they are now, for restore() to go back to. closing a scope leaves the values of its
+    # slots behind, so a name declared by a program that then failed could read a value some other
+    # variable left there: undoing its declarations is what stops that
+    def save(self) -> Tuple[List[Dict[str, int]], int]:
+        return [dict(scope) for scope in self.varmaps], self.next_slot
+
+    # can be called with the same saved scopes any number of times
+    def restore(self, saved: Tuple[List[Dict[str, int]], int]):
+        scopes, self.next_slot = saved
+        self.varmaps[:] = [dict(scope) for scope in scopes]
+
     def __repr__(self) -> str:
-        varmap_strings = [f'{i}: {varmap}'for i, varmap in enumerate(self.varmaps)]
-        return '\n'.join(varmap_strings)
\ No newline at end of file
+        varmap_strings = [f'{i}: { {key: self.values[slot] for key, slot in varmap.items()} }' for i, varmap in enumerate(self.varmaps)]
+        return '\n'.join(varmap_strings)
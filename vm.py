@@ -0,0 +1,92 @@
+from bytecode import (Code, LOAD_CONST, LOAD_NAME, STORE_NAME, UNARY_NOT, BINARY_OP, JUMP_IF_FALSE,
+                      JUMP_IF_NOT_TRUE, JUMP, PRINT, BINARY_OP_CONST, BINARY_OP_NAME, GET_RANGE, FOR_RANGE)
+from varmap import VarMap
+from output import Output
+
+# runs the bytecode made by bytecode.compile_program with a stack.
+# block boundaries were turned into jump offsets and variables into slots by the compiler, so nothing
+# is searched for at runtime. varmap must be the VarMap the program was resolved against
+class VirtualMachine(object):
+    def __init__(self, varmap: VarMap = None, output: Output = None):
+        self.varmap = varmap if varmap is not None else VarMap()
+        self.output = output if output is not None else Output()
+        # what the counted loops that are running have left to count, by their number in code.ranges.
+        # kept here rather than on the stack so that execute can stop inside a loop and carry on later
+        self.iterators = {}
+
+    def run(self, code: Code):
+        try:
+            self.execute(code)
+        finally:
+            self.output.flush()
+
+    # runs code from pc and returns where it stopped, which is len(code.instructions) once it's done.
+    # with steps it also stops once that many loop iterations have started (see interpreter.py), right
+    # before the body of the last one. the stack is always empty there, so passing the returned pc
+    # back in carries on where it left off
+    def execute(self, code: Code, pc: int = 0, steps: int = -1) -> int:
+        instructions = code.instructions
+        constants = code.constants
+        operations = [operation for _, operation, _ in code.operations]
+        operands = [operand for _, _, operand in code.operations]
+        ranges = code.ranges
+        iterators = self.iterators
+        values = self.varmap.values
+        stack = []
+        push = stack.append
+        pop = stack.pop
+        write = self.output.write
+
+        end = len(instructions)
+        while pc < end:
+            opcode = instructions[pc]
+            arg = instructions[pc+1]
+            pc += 2
+            # roughly ordered by how often each instruction runs
+            if opcode == LOAD_NAME:
+                push(values[arg])
+            elif opcode == BINARY_OP_CONST:
+                stack[-1] = operations[arg](stack[-1], operands[arg])
+            elif opcode == STORE_NAME:
+                values[arg] = pop()
+            elif opcode == BINARY_OP_NAME:
+                stack[-1] = operations[arg](stack[-1], values[operands[arg]])
+            elif opcode == FOR_RANGE:
+                value = next(iterators[arg], None)
+                if value is not None:
+                    slot, _, _, pc = ranges[arg]
+                    values[slot] = value
+                    # the start of an iteration, like JUMP_IF_NOT_TRUE not jumping
+                    steps -= 1
+                    if steps == 0:
+                        return pc
+            elif opcode == LOAD_CONST:
+                push(constants[arg])
+            elif opcode == BINARY_OP:
+                term2 = pop()
+                stack[-1] = operations[arg](stack[-1], term2)
+            elif opcode == JUMP_IF_NOT_TRUE:
+                # only loops jump on this, so not jumping is the start of an iteration
+                if pop() is not True:
+                    pc = arg
+                else:
+                    steps -= 1
+                    if steps == 0:
+                        return pc
+            elif opcode == JUMP:
+                pc = arg
+            elif opcode == JUMP_IF_FALSE:
+                condition = pop()
+                if condition is False:
+                    pc = arg
+                elif condition is not True:
+                    raise TypeError(f'Line {code.lines[pc // 2 - 1]}: expected boolean expression in "if" statement')
+            elif opcode == PRINT:
+                write(f'{pop()}\n' if arg else '\n')
+            elif opcode == UNARY_NOT:
+                stack[-1] = not stack[-1]
+            elif opcode == GET_RANGE:
+                bound = pop()
+                _, step, adjustment, _ = ranges[arg]
+                iterators[arg] = iter(range(pop(), bound + adjustment, step))
+        return pc